@@ -1,13 +1,34 @@
 import ast
 import logging
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import ClassVar, Dict, List, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass, replace
+from functools import cached_property
 from enum import Enum
+from collections import OrderedDict
+from array import array
+from itertools import chain
 import re
+import bisect
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Literal substrings at least one of which every security pattern requires
+_LITERAL_HINTS = (
+    'execute',
+    'os.system',
+    'subprocess.call',
+    'pickle.loads',
+    'yaml.load',
+    'password',
+    'api_key'
+)
+
 class SecurityLevel(Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -53,7 +74,7 @@ class DocumentationIssue:
 @dataclass
 class AnalysisReport:
     timestamp: datetime
-    code_hash: str
+    code_hash: str  # BLAKE2b-128 hex digest of the source, stable across runs
     security_score: float
     best_practices_score: float
     performance_score: float
@@ -63,18 +84,203 @@ class AnalysisReport:
     best_practice_issues: List[BestPracticeIssue]
     performance_issues: List[PerformanceIssue]
     documentation_issues: List[DocumentationIssue]
-    summary: str
-    recommendations: List[str]
+
+    @cached_property
+    def summary(self) -> str:
+        """Analysis summary, built on first access."""
+        total_issues = (len(self.security_issues) + len(self.best_practice_issues) +
+                       len(self.performance_issues) + len(self.documentation_issues))
+        
+        return (
+            f"Found {total_issues} issues:\n"
+            f"- Security: {len(self.security_issues)} issues\n"
+            f"- Best Practices: {len(self.best_practice_issues)} issues\n"
+            f"- Performance: {len(self.performance_issues)} issues\n"
+            f"- Documentation: {len(self.documentation_issues)} issues"
+        )
+
+    @cached_property
+    def recommendations(self) -> List[str]:
+        """Prioritized recommendations, built on first access."""
+        critical: List[str] = []
+        high: List[str] = []
+        required: List[str] = []
+        
+        # Bucket security issues by priority in a single pass
+        for issue in self.security_issues:
+            if issue.level == SecurityLevel.CRITICAL:
+                critical.append(f"CRITICAL: {issue.recommendation}")
+            elif issue.level == SecurityLevel.HIGH:
+                high.append(f"HIGH: {issue.recommendation}")
+        
+        # Add important best practices
+        for issue in self.best_practice_issues:
+            if issue.level == BestPracticeLevel.REQUIRED:
+                required.append(f"REQUIRED: {issue.recommended_practice}")
+        
+        # Critical security issues first, then other high-priority issues
+        return critical + high + required
+
+def _code_digest(code: str) -> str:
+    """Stable digest of the source used as the report cache key."""
+    return hashlib.blake2b(code.encode('utf-8'), digest_size=16).hexdigest()
+
+# Analyzer reused by a worker process across the files it receives
+_worker_analyzer: Optional['CodeAnalyzer'] = None
+
+def _analyze_one(code: str) -> 'AnalysisReport':
+    """Analyze a single file inside a worker process."""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = CodeAnalyzer()
+    return _worker_analyzer._analyze(code)
+
+class _Collector(ast.NodeVisitor):
+    """Collect AST findings for every analysis in one depth-first pass."""
+
+    def __init__(self, analyzer: 'CodeAnalyzer'):
+        self.analyzer = analyzer
+        self.findings: Dict[str, list] = {
+            'security': [],
+            'best_practices': [],
+            'performance': [],
+            'documentation': []
+        }
+        self._loop_depth: int = 0
+        self._outer_loop: Optional[ast.For] = None
+
+    def visit_Call(self, node: ast.Call):
+        # Check for dangerous function calls
+        if isinstance(node.func, ast.Name):
+            if node.func.id in ['eval', 'exec']:
+                self.findings['security'].append(SecurityIssue(
+                    description="Use of dangerous function detected",
+                    level=SecurityLevel.CRITICAL,
+                    line_number=node.lineno,
+                    code_snippet=f"{node.func.id}(...)",
+                    recommendation="Avoid using eval/exec as they can execute arbitrary code"
+                ))
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        if not self.analyzer._func_name_re.match(node.name):
+            self.findings['best_practices'].append(BestPracticeIssue(
+                description="Function naming convention violation",
+                level=BestPracticeLevel.RECOMMENDED,
+                line_number=node.lineno,
+                current_practice=node.name,
+                recommended_practice="Use snake_case for function names"
+            ))
+        self._check_docstring(node)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if not self.analyzer._class_name_re.match(node.name):
+            self.findings['best_practices'].append(BestPracticeIssue(
+                description="Class naming convention violation",
+                level=BestPracticeLevel.RECOMMENDED,
+                line_number=node.lineno,
+                current_practice=node.name,
+                recommended_practice="Use PascalCase for class names"
+            ))
+        self._check_docstring(node)
+        self.generic_visit(node)
+
+    def visit_For(self, node: ast.For):
+        if self._loop_depth == 0:
+            self._outer_loop = node
+        self._loop_depth += 1
+        if self._loop_depth >= 2 and self._outer_loop is not None:
+            # Report each loop nest once, at its outermost loop
+            self.findings['performance'].append(PerformanceIssue(
+                description="Nested loop detected",
+                impact="O(n²) time complexity",
+                line_number=self._outer_loop.lineno,
+                suggestion="Consider using more efficient data structures or algorithms",
+                estimated_improvement="Could be O(n) with proper optimization"
+            ))
+            self._outer_loop = None
+        self.generic_visit(node)
+        self._loop_depth -= 1
+
+    def visit_ListComp(self, node: ast.ListComp):
+        self._check_comprehension(node)
+        self.generic_visit(node)
+
+    def visit_DictComp(self, node: ast.DictComp):
+        self._check_comprehension(node)
+        self.generic_visit(node)
+
+    def _check_comprehension(self, node: ast.AST):
+        """Check for comprehensions with multiple generators."""
+        if len(node.generators) > 1:
+            self.findings['performance'].append(PerformanceIssue(
+                description="Complex comprehension detected",
+                impact="Reduced readability and potential performance impact",
+                line_number=node.lineno,
+                suggestion="Consider breaking down into multiple steps",
+                estimated_improvement="Better readability and maintainability"
+            ))
+
+    def _check_docstring(self, node: ast.AST):
+        """Check function/class documentation."""
+        missing_elements: List[str] = []
+        
+        # Check for docstring
+        if ast.get_docstring(node) is None:
+            missing_elements.append("docstring")
+        
+        # Check function parameter documentation
+        if isinstance(node, ast.FunctionDef):
+            if node.args.args and not ast.get_docstring(node):
+                missing_elements.append("parameter documentation")
+        
+        if missing_elements:
+            self.findings['documentation'].append(DocumentationIssue(
+                description=f"Missing documentation in {node.name}",
+                missing_elements=missing_elements,
+                line_number=node.lineno,
+                suggestion="Add comprehensive documentation"
+            ))
 
 class CodeAnalyzer:
-    def __init__(self):
+    _RECOMMENDATIONS: ClassVar[Dict[str, str]] = {
+        'sql_injection': "Use parameterized queries or ORM",
+        'command_injection': "Use subprocess.run with shell=False",
+        'unsafe_deserialization': "Use safe alternatives like json.loads",
+        'hardcoded_secrets': "Use environment variables or secure secret management"
+    }
+
+    _SECURITY_DESCRIPTIONS: ClassVar[Dict[str, str]] = {
+        'sql_injection': "Potential sql_injection vulnerability detected",
+        'command_injection': "Potential command_injection vulnerability detected",
+        'unsafe_deserialization': "Potential unsafe_deserialization vulnerability detected",
+        'hardcoded_secrets': "Potential hardcoded_secrets vulnerability detected"
+    }
+
+    def __init__(self, *, cache_size: int = 256):
+        # LRU of finished reports keyed by source digest (shared across worker threads)
+        self.cache_size = cache_size
+        self._report_cache: 'OrderedDict[str, AnalysisReport]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Whitespace/character classes exclude '\n' so matches never span lines
         self.security_patterns = {
-            'sql_injection': r'execute\s*\(\s*["\'].*?\%.*?["\']\s*\)',
-            'command_injection': r'os\.system\(|subprocess\.call\(',
-            'unsafe_deserialization': r'pickle\.loads|yaml\.load\(',
-            'hardcoded_secrets': r'password\s*=\s*["\'][^"\']+["\']|api_key\s*=\s*["\'][^"\']+["\']'
+            name: re.compile(pattern) for name, pattern in {
+                'sql_injection': r'execute[^\S\n]*\([^\S\n]*["\'].*?\%.*?["\'][^\S\n]*\)',
+                'command_injection': r'os\.system\(|subprocess\.call\(',
+                'unsafe_deserialization': r'pickle\.loads|yaml\.load\(',
+                'hardcoded_secrets': r'password[^\S\n]*=[^\S\n]*["\'][^"\'\n]+["\']|api_key[^\S\n]*=[^\S\n]*["\'][^"\'\n]+["\']'
+            }.items()
         }
 
+        # Single alternation so the source buffer is scanned once for all patterns;
+        # no DOTALL, so '.' still stops at line ends like in the per-pattern scans
+        self._security_combined = re.compile('|'.join(
+            f'(?P<{name}>{pattern.pattern})'
+            for name, pattern in self.security_patterns.items()
+        ))
+
         self.best_practice_patterns = {
             'naming_convention': {
                 'function': r'^[a-z_][a-z0-9_]*$',
@@ -85,17 +291,72 @@ class CodeAnalyzer:
             'max_function_length': 50
         }
 
+        # Compile naming regexes once instead of on every AST node
+        naming = self.best_practice_patterns['naming_convention']
+        self._func_name_re = re.compile(naming['function'])
+        self._class_name_re = re.compile(naming['class'])
+        self._const_name_re = re.compile(naming['constant'])
+
+        # Shared by every line-length issue instead of formatting it per line
+        self._line_length_practice = (
+            f"Keep lines under {self.best_practice_patterns['max_line_length']} characters"
+        )
+
     async def analyze_code(self, code: str) -> AnalysisReport:
         """Analyze code and generate a comprehensive report."""
+        # Analysis is pure CPU work; keep it off the event loop
+        return await asyncio.to_thread(self._analyze, code)
+
+    async def analyze_many(self, codes: List[str]) -> List[AnalysisReport]:
+        """Analyze multiple independent files in parallel worker processes."""
+        return await asyncio.to_thread(self._analyze_many, codes)
+
+    def _analyze_many(self, codes: List[str]) -> List[AnalysisReport]:
+        """Serve cached reports locally and shard the rest across processes."""
+        reports: List[Optional[AnalysisReport]] = [
+            self._get_cached_report(_code_digest(code)) for code in codes
+        ]
+        pending = [i for i, report in enumerate(reports) if report is None]
+        
+        if len(pending) < 2:
+            # Not worth the process pool start-up cost
+            for i in pending:
+                reports[i] = self._analyze(codes[i])
+            return reports
+        
+        workers = os.cpu_count() or 1
+        chunksize = max(1, len(pending) // (4 * workers))
+        with ProcessPoolExecutor() as pool:
+            results = pool.map(_analyze_one, (codes[i] for i in pending), chunksize=chunksize)
+            for i, report in zip(pending, results):
+                self._cache_report(report.code_hash, report)
+                reports[i] = report
+        
+        return reports
+
+    def _analyze(self, code: str) -> AnalysisReport:
+        """Run all analyses synchronously and build the report."""
         try:
+            # Reuse the report for identical source
+            code_hash = _code_digest(code)
+            cached = self._get_cached_report(code_hash)
+            if cached is not None:
+                return cached
+            
             # Parse the code
             tree = ast.parse(code)
             
+            # Collect AST-based findings for every analysis in one traversal
+            findings = self._walk_once(tree)
+            
+            # Line layout shared by the text-based checks
+            newline_offsets, line_lengths = self._line_layout(code)
+            
             # Perform various analyses
-            security_issues = await self._analyze_security(code, tree)
-            best_practice_issues = await self._analyze_best_practices(code, tree)
-            performance_issues = await self._analyze_performance(code, tree)
-            documentation_issues = await self._analyze_documentation(code, tree)
+            security_issues = self._analyze_security(code, newline_offsets, findings['security'])
+            best_practice_issues = self._analyze_best_practices(code, line_lengths, findings['best_practices'])
+            performance_issues = self._analyze_performance(code, findings['performance'])
+            documentation_issues = self._analyze_documentation(code, findings['documentation'])
             
             # Calculate scores
             security_score = self._calculate_security_score(security_issues)
@@ -112,7 +373,7 @@ class CodeAnalyzer:
             # Generate report
             report = AnalysisReport(
                 timestamp=datetime.now(),
-                code_hash=hash(code),
+                code_hash=code_hash,
                 security_score=security_score,
                 best_practices_score=best_practices_score,
                 performance_score=performance_score,
@@ -121,154 +382,122 @@ class CodeAnalyzer:
                 security_issues=security_issues,
                 best_practice_issues=best_practice_issues,
                 performance_issues=performance_issues,
-                documentation_issues=documentation_issues,
-                summary=self._generate_summary(
-                    security_issues,
-                    best_practice_issues,
-                    performance_issues,
-                    documentation_issues
-                ),
-                recommendations=self._generate_recommendations(
-                    security_issues,
-                    best_practice_issues,
-                    performance_issues,
-                    documentation_issues
-                )
+                documentation_issues=documentation_issues
             )
             
+            self._cache_report(code_hash, report)
             return report
             
         except Exception as e:
             logger.error(f"Error analyzing code: {str(e)}")
             raise
 
-    async def _analyze_security(self, code: str, tree: ast.AST) -> List[SecurityIssue]:
+    def _get_cached_report(self, code_hash: str) -> Optional[AnalysisReport]:
+        """Get a cached report for the given source digest, if any."""
+        with self._cache_lock:
+            report = self._report_cache.get(code_hash)
+            if report is None:
+                return None
+            self._report_cache.move_to_end(code_hash)
+        return replace(report, timestamp=datetime.now())
+
+    def _cache_report(self, code_hash: str, report: AnalysisReport):
+        """Cache a report, evicting the least recently used entries."""
+        with self._cache_lock:
+            self._report_cache[code_hash] = report
+            self._report_cache.move_to_end(code_hash)
+            while len(self._report_cache) > self.cache_size:
+                self._report_cache.popitem(last=False)
+
+    def _walk_once(self, tree: ast.AST) -> Dict[str, list]:
+        """Traverse the AST once, collecting findings for all analyses."""
+        collector = _Collector(self)
+        collector.visit(tree)
+        return collector.findings
+
+    def _line_layout(self, code: str) -> Tuple[array, array]:
+        """Return newline offsets and per-line lengths without splitting the source."""
+        # Unboxed int arrays keep large files from allocating an int object per line
+        newline_offsets = array('q', (m.start() for m in re.finditer('\n', code)))
+        line_lengths = array('q', (
+            end - start - 1
+            for start, end in zip(chain((-1,), newline_offsets), chain(newline_offsets, (len(code),)))
+        ))
+        return newline_offsets, line_lengths
+
+    def _analyze_security(
+        self,
+        code: str,
+        newline_offsets: Sequence[int],
+        ast_issues: List[SecurityIssue]
+    ) -> List[SecurityIssue]:
         """Analyze code for security issues."""
-        issues = []
+        issues: List[SecurityIssue] = []
         
-        # Check for known security patterns
-        for line_num, line in enumerate(code.split('\n'), 1):
+        # One pass over the source finds the lines any pattern can match,
+        # skipping the regex engine when no pattern can possibly match
+        matches = (
+            self._security_combined.finditer(code)
+            if any(hint in code for hint in _LITERAL_HINTS)
+            else ()
+        )
+        candidate_lines = sorted({
+            bisect.bisect_right(newline_offsets, match.start()) for match in matches
+        })
+
+        # Combined matches never overlap, so one can swallow another finding on
+        # its line; every pattern rechecks the line, once per (line, pattern)
+        for line_idx in candidate_lines:
+            line_start = newline_offsets[line_idx - 1] + 1 if line_idx else 0
+            line_end = newline_offsets[line_idx] if line_idx < len(newline_offsets) else len(code)
+            line = code[line_start:line_end]
             for pattern_name, pattern in self.security_patterns.items():
-                if re.search(pattern, line):
+                if pattern.search(line):
                     issues.append(SecurityIssue(
-                        description=f"Potential {pattern_name} vulnerability detected",
+                        description=self._SECURITY_DESCRIPTIONS[pattern_name],
                         level=SecurityLevel.HIGH,
-                        line_number=line_num,
+                        line_number=line_idx + 1,
                         code_snippet=line.strip(),
                         recommendation=self._get_security_recommendation(pattern_name)
                     ))
         
-        # Analyze AST for security issues
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Call):
-                # Check for dangerous function calls
-                if isinstance(node.func, ast.Name):
-                    if node.func.id in ['eval', 'exec']:
-                        issues.append(SecurityIssue(
-                            description="Use of dangerous function detected",
-                            level=SecurityLevel.CRITICAL,
-                            line_number=node.lineno,
-                            code_snippet=f"{node.func.id}(...)",
-                            recommendation="Avoid using eval/exec as they can execute arbitrary code"
-                        ))
+        # Add issues found while walking the AST
+        issues.extend(ast_issues)
         
         return issues
 
-    async def _analyze_best_practices(self, code: str, tree: ast.AST) -> List[BestPracticeIssue]:
+    def _analyze_best_practices(
+        self,
+        code: str,
+        line_lengths: Sequence[int],
+        ast_issues: List[BestPracticeIssue]
+    ) -> List[BestPracticeIssue]:
         """Analyze code for best practice violations."""
-        issues = []
-        
-        # Check naming conventions
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                if not re.match(self.best_practice_patterns['naming_convention']['function'], node.name):
-                    issues.append(BestPracticeIssue(
-                        description="Function naming convention violation",
-                        level=BestPracticeLevel.RECOMMENDED,
-                        line_number=node.lineno,
-                        current_practice=node.name,
-                        recommended_practice="Use snake_case for function names"
-                    ))
-            
-            elif isinstance(node, ast.ClassDef):
-                if not re.match(self.best_practice_patterns['naming_convention']['class'], node.name):
-                    issues.append(BestPracticeIssue(
-                        description="Class naming convention violation",
-                        level=BestPracticeLevel.RECOMMENDED,
-                        line_number=node.lineno,
-                        current_practice=node.name,
-                        recommended_practice="Use PascalCase for class names"
-                    ))
+        issues = list(ast_issues)
         
         # Check line lengths
-        for line_num, line in enumerate(code.split('\n'), 1):
-            if len(line) > self.best_practice_patterns['max_line_length']:
+        max_line_length = self.best_practice_patterns['max_line_length']
+        for line_num, line_length in enumerate(line_lengths, 1):
+            if line_length > max_line_length:
                 issues.append(BestPracticeIssue(
                     description="Line too long",
                     level=BestPracticeLevel.SUGGESTION,
                     line_number=line_num,
-                    current_practice=f"Line length: {len(line)}",
-                    recommended_practice=f"Keep lines under {self.best_practice_patterns['max_line_length']} characters"
+                    current_practice=f"Line length: {line_length}",
+                    recommended_practice=self._line_length_practice
                 ))
         
         return issues
 
-    async def _analyze_performance(self, code: str, tree: ast.AST) -> List[PerformanceIssue]:
+    def _analyze_performance(self, code: str, ast_issues: List[PerformanceIssue]) -> List[PerformanceIssue]:
         """Analyze code for performance issues."""
-        issues = []
-        
-        for node in ast.walk(tree):
-            # Check for nested loops
-            if isinstance(node, ast.For):
-                for child in ast.walk(node):
-                    if isinstance(child, ast.For):
-                        issues.append(PerformanceIssue(
-                            description="Nested loop detected",
-                            impact="O(n²) time complexity",
-                            line_number=node.lineno,
-                            suggestion="Consider using more efficient data structures or algorithms",
-                            estimated_improvement="Could be O(n) with proper optimization"
-                        ))
-            
-            # Check for multiple list/dict comprehensions
-            if isinstance(node, ast.ListComp) or isinstance(node, ast.DictComp):
-                if len(node.generators) > 1:
-                    issues.append(PerformanceIssue(
-                        description="Complex comprehension detected",
-                        impact="Reduced readability and potential performance impact",
-                        line_number=node.lineno,
-                        suggestion="Consider breaking down into multiple steps",
-                        estimated_improvement="Better readability and maintainability"
-                    ))
-        
-        return issues
+        # Nested loops and complex comprehensions are collected during the AST walk
+        return list(ast_issues)
 
-    async def _analyze_documentation(self, code: str, tree: ast.AST) -> List[DocumentationIssue]:
+    def _analyze_documentation(self, code: str, ast_issues: List[DocumentationIssue]) -> List[DocumentationIssue]:
         """Analyze code for documentation issues."""
-        issues = []
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                missing_elements = []
-                
-                # Check for docstring
-                if ast.get_docstring(node) is None:
-                    missing_elements.append("docstring")
-                
-                # Check function parameter documentation
-                if isinstance(node, ast.FunctionDef):
-                    if node.args.args and not ast.get_docstring(node):
-                        missing_elements.append("parameter documentation")
-                
-                if missing_elements:
-                    issues.append(DocumentationIssue(
-                        description=f"Missing documentation in {node.name}",
-                        missing_elements=missing_elements,
-                        line_number=node.lineno,
-                        suggestion="Add comprehensive documentation"
-                    ))
-        
-        return issues
+        # Missing docstrings are collected during the AST walk
+        return list(ast_issues)
 
     def _calculate_security_score(self, issues: List[SecurityIssue]) -> float:
         """Calculate security score based on issues."""
@@ -313,49 +542,7 @@ class CodeAnalyzer:
 
     def _get_security_recommendation(self, issue_type: str) -> str:
         """Get security recommendation for specific issue type."""
-        recommendations = {
-            'sql_injection': "Use parameterized queries or ORM",
-            'command_injection': "Use subprocess.run with shell=False",
-            'unsafe_deserialization': "Use safe alternatives like json.loads",
-            'hardcoded_secrets': "Use environment variables or secure secret management"
-        }
-        return recommendations.get(issue_type, "Review and fix security issue")
-
-    def _generate_summary(self, security_issues, best_practice_issues,
-                         performance_issues, documentation_issues) -> str:
-        """Generate analysis summary."""
-        total_issues = (len(security_issues) + len(best_practice_issues) +
-                       len(performance_issues) + len(documentation_issues))
-        
-        return (
-            f"Found {total_issues} issues:\n"
-            f"- Security: {len(security_issues)} issues\n"
-            f"- Best Practices: {len(best_practice_issues)} issues\n"
-            f"- Performance: {len(performance_issues)} issues\n"
-            f"- Documentation: {len(documentation_issues)} issues"
-        )
-
-    def _generate_recommendations(self, security_issues, best_practice_issues,
-                                performance_issues, documentation_issues) -> List[str]:
-        """Generate prioritized recommendations."""
-        recommendations = []
-        
-        # Add critical security issues first
-        for issue in security_issues:
-            if issue.level == SecurityLevel.CRITICAL:
-                recommendations.append(f"CRITICAL: {issue.recommendation}")
-        
-        # Add other high-priority issues
-        for issue in security_issues:
-            if issue.level == SecurityLevel.HIGH:
-                recommendations.append(f"HIGH: {issue.recommendation}")
-        
-        # Add important best practices
-        for issue in best_practice_issues:
-            if issue.level == BestPracticeLevel.REQUIRED:
-                recommendations.append(f"REQUIRED: {issue.recommended_practice}")
-        
-        return recommendations
+        return CodeAnalyzer._RECOMMENDATIONS.get(issue_type, "Review and fix security issue")
 
 # Example usage
 if __name__ == "__main__":
@@ -382,5 +569,4 @@ def calculate_total(items):
         except Exception as e:
             print(f"Error: {e}")
 
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
@@ -4,11 +4,104 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import re
+from functools import lru_cache
 
 from .groq_client import GroqClient
 
 logger = logging.getLogger(__name__)
 
+# Matches a class statement at the start of any line (indented snippets included)
+_CLASS_DEF_RE = re.compile(r'^\s*class\s+\w', re.M)
+
+_PROMPT_SUFFIX = "\n\nPlease provide detailed documentation following these requirements."
+
+# Prompt prefixes depend only on the config flags, so build each variant once
+@lru_cache(maxsize=64)
+def _function_prompt_prefix(
+    include_parameters: bool,
+    include_returns: bool,
+    include_examples: bool,
+    include_errors: bool
+) -> str:
+    """Build the fixed part of a function documentation prompt."""
+    prompt_parts = [
+        "Generate comprehensive Python function documentation with the following requirements:",
+        "1. Clear description of functionality",
+        "2. Proper formatting and structure"
+    ]
+
+    if include_parameters:
+        prompt_parts.append("3. Parameter descriptions with types")
+    
+    if include_returns:
+        prompt_parts.append("4. Return value details")
+    
+    if include_examples:
+        prompt_parts.append("5. Usage examples")
+    
+    if include_errors:
+        prompt_parts.append("6. Possible exceptions")
+
+    prompt_parts.append("\nFunction code:")
+    return "\n".join(prompt_parts) + "\n"
+
+@lru_cache(maxsize=64)
+def _class_prompt_prefix(
+    include_parameters: bool,
+    include_types: bool,
+    include_examples: bool,
+    include_errors: bool
+) -> str:
+    """Build the fixed part of a class documentation prompt."""
+    prompt_parts = [
+        "Generate comprehensive Python class documentation with the following requirements:",
+        "1. Class purpose and overview",
+        "2. Proper formatting and structure",
+        "3. Method descriptions"
+    ]
+
+    if include_parameters:
+        prompt_parts.append("4. Constructor parameters")
+    
+    if include_types:
+        prompt_parts.append("5. Attribute types")
+    
+    if include_examples:
+        prompt_parts.append("6. Usage examples")
+    
+    if include_errors:
+        prompt_parts.append("7. Possible exceptions")
+
+    prompt_parts.append("\nClass code:")
+    return "\n".join(prompt_parts) + "\n"
+
+@lru_cache(maxsize=64)
+def _module_prompt_prefix(
+    include_examples: bool,
+    include_types: bool,
+    include_errors: bool
+) -> str:
+    """Build the fixed part of a module documentation prompt."""
+    prompt_parts = [
+        "Generate comprehensive Python module documentation with the following requirements:",
+        "1. Module purpose and overview",
+        "2. Proper formatting and structure",
+        "3. Class and function listings"
+    ]
+
+    if include_examples:
+        prompt_parts.append("4. Usage examples")
+    
+    if include_types:
+        prompt_parts.append("5. Type information")
+    
+    if include_errors:
+        prompt_parts.append("6. Common errors and solutions")
+
+    prompt_parts.append("\nModule code:")
+    return "\n".join(prompt_parts) + "\n"
+
 @dataclass
 class DocumentationConfig:
     include_examples: bool = True
@@ -24,9 +117,10 @@ class DocGenerationError(Exception):
     pass
 
 class DocumentationGenerator:
-    def __init__(self, groq_client: GroqClient):
+    def __init__(self, groq_client: GroqClient, max_concurrency: int = 5):
         self.groq_client = groq_client
         self.default_config = DocumentationConfig()
+        self.max_concurrency = max_concurrency  # Parallel Groq requests per project
 
     async def generate_function_docs(
         self,
@@ -81,86 +175,32 @@ class DocumentationGenerator:
 
     def _create_function_doc_prompt(self, code: str, config: DocumentationConfig) -> str:
         """Create prompt for function documentation."""
-        prompt_parts = [
-            "Generate comprehensive Python function documentation with the following requirements:",
-            "1. Clear description of functionality",
-            "2. Proper formatting and structure"
-        ]
-
-        if config.include_parameters:
-            prompt_parts.append("3. Parameter descriptions with types")
-        
-        if config.include_returns:
-            prompt_parts.append("4. Return value details")
-        
-        if config.include_examples:
-            prompt_parts.append("5. Usage examples")
-        
-        if config.include_errors:
-            prompt_parts.append("6. Possible exceptions")
-
-        prompt_parts.extend([
-            "\nFunction code:",
-            code,
-            "\nPlease provide detailed documentation following these requirements."
-        ])
-
-        return "\n".join(prompt_parts)
+        prefix = _function_prompt_prefix(
+            config.include_parameters,
+            config.include_returns,
+            config.include_examples,
+            config.include_errors
+        )
+        return prefix + code + _PROMPT_SUFFIX
 
     def _create_class_doc_prompt(self, code: str, config: DocumentationConfig) -> str:
         """Create prompt for class documentation."""
-        prompt_parts = [
-            "Generate comprehensive Python class documentation with the following requirements:",
-            "1. Class purpose and overview",
-            "2. Proper formatting and structure",
-            "3. Method descriptions"
-        ]
-
-        if config.include_parameters:
-            prompt_parts.append("4. Constructor parameters")
-        
-        if config.include_types:
-            prompt_parts.append("5. Attribute types")
-        
-        if config.include_examples:
-            prompt_parts.append("6. Usage examples")
-        
-        if config.include_errors:
-            prompt_parts.append("7. Possible exceptions")
-
-        prompt_parts.extend([
-            "\nClass code:",
-            code,
-            "\nPlease provide detailed documentation following these requirements."
-        ])
-
-        return "\n".join(prompt_parts)
+        prefix = _class_prompt_prefix(
+            config.include_parameters,
+            config.include_types,
+            config.include_examples,
+            config.include_errors
+        )
+        return prefix + code + _PROMPT_SUFFIX
 
     def _create_module_doc_prompt(self, code: str, config: DocumentationConfig) -> str:
         """Create prompt for module documentation."""
-        prompt_parts = [
-            "Generate comprehensive Python module documentation with the following requirements:",
-            "1. Module purpose and overview",
-            "2. Proper formatting and structure",
-            "3. Class and function listings"
-        ]
-
-        if config.include_examples:
-            prompt_parts.append("4. Usage examples")
-        
-        if config.include_types:
-            prompt_parts.append("5. Type information")
-        
-        if config.include_errors:
-            prompt_parts.append("6. Common errors and solutions")
-
-        prompt_parts.extend([
-            "\nModule code:",
-            code,
-            "\nPlease provide detailed documentation following these requirements."
-        ])
-
-        return "\n".join(prompt_parts)
+        prefix = _module_prompt_prefix(
+            config.include_examples,
+            config.include_types,
+            config.include_errors
+        )
+        return prefix + code + _PROMPT_SUFFIX
 
     def _format_documentation(self, doc_text: str, format_type: str) -> str:
         """Format the documentation according to specified format."""
@@ -188,23 +228,37 @@ class DocumentationGenerator:
     ) -> Dict[str, str]:
         """Generate documentation for multiple files in a project."""
         config = config or self.default_config
-        documentation = {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
         
         try:
-            for filename, code in files.items():
-                if filename.endswith('.py'):
-                    if 'class' in code.lower():
-                        doc = await self.generate_class_docs(code, config)
-                    else:
-                        doc = await self.generate_module_docs(code, config)
-                    documentation[filename] = doc
+            filenames = [filename for filename in files if filename.endswith('.py')]
+            results = await asyncio.gather(*(
+                self._dispatch(files[filename], config, semaphore)
+                for filename in filenames
+            ))
             
-            return documentation
+            return dict(zip(filenames, results))
             
         except Exception as e:
             logger.error(f"Error generating project documentation: {str(e)}")
             raise DocGenerationError(f"Failed to generate project documentation: {str(e)}")
 
+    async def _dispatch(
+        self,
+        code: str,
+        config: DocumentationConfig,
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """Generate class or module docs for one file, bounded by the semaphore."""
+        async with semaphore:
+            if self._has_class_definition(code):
+                return await self.generate_class_docs(code, config)
+            return await self.generate_module_docs(code, config)
+
+    def _has_class_definition(self, code: str) -> bool:
+        """Check whether the code contains a class definition."""
+        return _CLASS_DEF_RE.search(code) is not None
+
     async def update_existing_docs(
         self,
         code: str,
@@ -1,16 +1,39 @@
+"""Groq LLM client for code, pull request and documentation analysis.
+
+The client is event-loop agnostic; the application entry point (src/main.py)
+runs on uvloop, which the throughput figures for fan-out analyses assume.
+"""
 import groq
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from functools import lru_cache
 from datetime import datetime, timedelta
-import json
+import hashlib
+import re
+import orjson
+import textwrap
 import aiohttp
-import backoff
+import httpx
+import msgspec
+from cachetools import TTLCache
 from dataclasses import dataclass
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
+
+from resilience import CircuitBreaker, SingleFlight, honor_retry_after
 
 logger = logging.getLogger(__name__)
 
+_JSON_START_RE = re.compile(r'[\[{]')
+
+# Transient Groq failures worth retrying
+_RETRYABLE_ERRORS = (groq.APIConnectionError, groq.RateLimitError, groq.InternalServerError)
+
 @dataclass
 class AnalysisResult:
     """Structure for analysis results"""
@@ -20,10 +43,93 @@ class AnalysisResult:
     confidence: float
     timestamp: datetime
 
+class CodeAnalysis(msgspec.Struct):
+    """Schema for code analysis responses"""
+    summary: str = ""
+    issues: List[str] = []
+    recommendations: List[str] = []
+    performance: List[str] = []
+
+class BatchCodeAnalysis(CodeAnalysis):
+    """Schema for one entry of a batch code analysis response"""
+    index: int = 0
+
+class PRAnalysis(msgspec.Struct):
+    """Schema for pull request analysis responses"""
+    summary: str = ""
+    impact: str = ""
+    security: List[str] = []
+    quality: str = ""
+    recommendations: List[str] = []
+
+class Documentation(msgspec.Struct):
+    """Schema for documentation responses"""
+    description: str = ""
+    parameters: List[str] = []
+    returns: str = ""
+    examples: List[str] = []
+    notes: List[str] = []
+
+def _canonical_key(obj: Any) -> str:
+    """Digest canonical JSON so equal payloads share a key regardless of key order."""
+    canonical = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+class _JsonCompletionScanner:
+    """Tracks bracket depth over streamed text to find where the first JSON value ends"""
+    
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> Optional[int]:
+        """Return the offset just past the closing bracket, or None while still open."""
+        for offset, char in enumerate(text):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char in '{[':
+                self._depth += 1
+            elif self._depth:
+                # Quotes only matter once inside the JSON value
+                if char == '"':
+                    self._in_string = True
+                elif char in '}]':
+                    self._depth -= 1
+                    if self._depth == 0:
+                        return offset + 1
+        return None
+
+def _extract_json_block(response: str) -> str:
+    """Strip prose or code fences around the first JSON object or array in a response."""
+    stripped = response.strip()
+    if stripped[:1] in ('{', '[') and stripped[-1:] in ('}', ']'):
+        return stripped
+    
+    # Locate the opening bracket in C, then bracket-match only from there
+    start = _JSON_START_RE.search(response)
+    if start is None:
+        return response
+    end = _JsonCompletionScanner().feed(response[start.start():])
+    if end is None:
+        return response[start.start():]
+    return response[start.start():start.start() + end]
+
+def _split_template(template: str, field: str) -> Tuple[str, str]:
+    """Split a single-placeholder template around its field."""
+    prefix, suffix = template.split('{' + field + '}')
+    return prefix, suffix
+
 class PromptTemplates:
     """Manages prompt templates for different analysis types"""
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def code_analysis() -> str:
         return """Analyze the following code and provide:
 1. A brief summary
@@ -31,11 +137,40 @@ class PromptTemplates:
 3. Best practices recommendations
 4. Performance considerations
 
+Respond with a JSON object with the fields "summary" (string), "issues",
+"recommendations" and "performance" (each a list of strings).
+
 Code:
 {code}
 """
 
     @staticmethod
+    @lru_cache(maxsize=1)
+    def batch_code_analysis() -> str:
+        return """Analyze each of the following {batch_size} code snippets and provide, for each one:
+1. A brief summary
+2. Potential issues or risks
+3. Best practices recommendations
+4. Performance considerations
+
+Each snippet is preceded by its position identifier in square brackets, e.g. [1].
+Return a JSON array indexed 1..{batch_size}: exactly one object per snippet, in order,
+each with an "index" field holding the snippet's position identifier.
+
+Example input:
+[1] def add(a, b): return a + b
+[2] def ratio(a, b): return a / b
+
+Example output:
+[{{"index": 1, "summary": "Adds two values", "issues": [], "recommendations": ["Add type hints"], "performance": []}},
+ {{"index": 2, "summary": "Divides two values", "issues": ["ZeroDivisionError when b is 0"], "recommendations": ["Guard against b == 0"], "performance": []}}]
+
+Snippets:
+{snippets}
+"""
+
+    @staticmethod
+    @lru_cache(maxsize=1)
     def pr_analysis() -> str:
         return """Review this Pull Request and provide:
 1. Overview of changes
@@ -44,11 +179,15 @@ Code:
 4. Implementation quality
 5. Recommendations
 
+Respond with a JSON object with the fields "summary", "impact" and "quality" (strings)
+and "security" and "recommendations" (lists of strings).
+
 Pull Request:
 {pr_content}
 """
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def documentation_generation() -> str:
         return """Generate comprehensive documentation for the following code:
 1. Function/class purpose
@@ -57,78 +196,178 @@ Pull Request:
 4. Usage examples
 5. Important notes
 
+Respond with a JSON object with the fields "description" and "returns" (strings)
+and "parameters", "examples" and "notes" (lists of strings).
+
 Code:
 {code}
 """
 
 class GroqClient:
+    # Bump the version to invalidate every shared entry at once
+    CACHE_KEY_PREFIX = "groq:v2:"
+
     def __init__(
         self,
         api_key: str,
         model_name: str = "mixtral-8x7b-32768",
-        cache_ttl: int = 3600,  # 1 hour cache TTL
-        max_retries: int = 3
+        cache_ttl: int = 8 * 3600,  # 8 hour cache TTL
+        cache_max: int = 10_000,  # Entries kept before LRU eviction
+        cache_backend: Optional[Any] = None,  # e.g. redis.asyncio.Redis, shared across workers
+        enable_cache: bool = True,  # False sends every request, for reproducible runs
+        max_retries: int = 3,
+        batch_size: int = 6,  # Snippets packed into one batch prompt
+        max_concurrency: int = 32,  # Keep just below the Groq RPM ceiling
+        max_tokens: int = 2000
     ):
-        self.client = groq.Groq(api_key=api_key)
+        # One HTTP/2 pool multiplexes concurrent completions over a single
+        # socket instead of a TLS handshake per parallel request
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            timeout=httpx.Timeout(60.0, connect=5.0)  # The SDK's own defaults
+        )
+        # Retries are owned by _make_groq_request's retry policy
+        self.client = groq.AsyncGroq(api_key=api_key, max_retries=0, http_client=self._http)
         self.model_name = model_name
         self.cache_ttl = cache_ttl
         self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
         self.templates = PromptTemplates()
+        # Concatenating around the placeholder skips the format parser per call
+        self._code_prefix, self._code_suffix = _split_template(
+            self.templates.code_analysis(), 'code'
+        )
+        self._pr_prefix, self._pr_suffix = _split_template(
+            self.templates.pr_analysis(), 'pr_content'
+        )
+        self._docs_prefix, self._docs_suffix = _split_template(
+            self.templates.documentation_generation(), 'code'
+        )
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._breaker = CircuitBreaker("groq", _RETRYABLE_ERRORS, fail_max=5, reset_timeout=30)
         
-        # Initialize cache
-        self._response_cache: Dict[str, Dict[str, Any]] = {}
+        self.enable_cache = enable_cache
+        # Bounded LRU with per-entry TTL on a monotonic clock
+        self._response_cache: TTLCache = TTLCache(maxsize=cache_max, ttl=cache_ttl)
+        # Run Redis with maxmemory-policy allkeys-lru so the shared tier stays bounded
+        self.cache_backend = cache_backend
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._inflight = SingleFlight()
 
-    def _generate_cache_key(self, content: str, analysis_type: str) -> str:
+    def _generate_cache_key(self, content: Any, analysis_type: str) -> str:
         """Generate a unique cache key."""
-        content_hash = hash(content)
-        return f"{analysis_type}:{content_hash}"
-
-    def _is_cached_valid(self, cache_entry: Dict[str, Any]) -> bool:
-        """Check if a cache entry is still valid."""
-        if not cache_entry:
-            return False
-        
-        cached_time = cache_entry.get('timestamp')
-        if not cached_time:
-            return False
-            
-        age = datetime.now() - cached_time
-        return age.seconds < self.cache_ttl
+        # Collapse indentation-only differences between otherwise identical snippets
+        if isinstance(content, str):
+            content = textwrap.dedent(content)
+        return f"{self.CACHE_KEY_PREFIX}{analysis_type}:{_canonical_key(content)}"
 
     async def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get a cached response if valid."""
-        cache_entry = self._response_cache.get(cache_key)
-        if cache_entry and self._is_cached_valid(cache_entry):
-            logger.debug(f"Cache hit for key: {cache_key}")
-            return cache_entry['response']
+        if not self.enable_cache:
+            return None
+        # Expired entries are dropped by the TTLCache itself
+        response = self._response_cache.get(cache_key)
+        if response is None and self.cache_backend is not None:
+            try:
+                raw = await self.cache_backend.get(cache_key)
+            except Exception as e:
+                # The shared tier is an optimization; fall through to the API
+                logger.warning("Cache backend read failed: %s", e)
+                raw = None
+            if raw is not None:
+                response = orjson.loads(raw)
+                self._response_cache[cache_key] = response
+        
+        if response is not None:
+            self.cache_hits += 1
+            logger.debug("Cache hit for key: %s", cache_key)
+            return response
+        self.cache_misses += 1
         return None
 
-    def _cache_response(self, cache_key: str, response: Dict[str, Any]):
+    async def _cache_response(self, cache_key: str, response: Dict[str, Any]):
         """Cache a response."""
-        self._response_cache[cache_key] = {
-            'response': response,
-            'timestamp': datetime.now()
-        }
+        if not self.enable_cache:
+            return
+        self._response_cache[cache_key] = response
+        if self.cache_backend is not None:
+            try:
+                await self.cache_backend.set(cache_key, orjson.dumps(response), ex=self.cache_ttl)
+            except Exception as e:
+                logger.warning("Cache backend write failed: %s", e)
 
-    @backoff.on_exception(
-        backoff.expo,
-        (aiohttp.ClientError, groq.error.APIError),
-        max_tries=3
-    )
-    async def _make_groq_request(self, prompt: str) -> Dict[str, Any]:
+    async def _make_groq_request(self, prompt: str) -> str:
         """Make a request to Groq API with exponential backoff retry."""
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.max_retries + 1),  # The first try plus max_retries
+            wait=wait_exponential_jitter(initial=0.1, max=30),  # First retry after ~100 ms
+            retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+            reraise=True
+        ):
+            with attempt:
+                # An open breaker raises UpstreamUnavailable, which is not retried
+                async with self._breaker.guard():
+                    content = await self._stream_completion(prompt)
+        return content
+
+    async def _stream_completion(self, prompt: str) -> str:
+        """Run one streamed completion attempt."""
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=2000
-            )
-            return response.choices[0].message.content
+            async with self._sem:
+                stream = await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=self.max_tokens,
+                    stream=True
+                )
+                
+                # Stop reading as soon as the first JSON value is complete
+                scanner = _JsonCompletionScanner()
+                parts = []
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices or not chunk.choices[0].delta.content:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        end = scanner.feed(delta)
+                        if end is not None:
+                            parts.append(delta[:end])
+                            break
+                        parts.append(delta)
+                finally:
+                    await stream.close()
+            
+            return "".join(parts)
+        except (groq.RateLimitError, groq.InternalServerError) as e:
+            logger.warning("Groq request throttled (%s), retrying", e.status_code)
+            await honor_retry_after(e.response.headers)
+            raise
         except Exception as e:
-            logger.error(f"Error making Groq request: {str(e)}")
+            logger.error("Error making Groq request: %s", e)
             raise
 
+    async def _request_validated(
+        self,
+        cache_key: str,
+        prompt: str,
+        schema: type
+    ) -> Dict[str, Any]:
+        """Request, validate and cache a response, sharing in-flight calls per key."""
+        async def fetch() -> Dict[str, Any]:
+            response = await self._make_groq_request(prompt)
+            
+            # Parse and validate the response in one pass
+            result = msgspec.to_builtins(msgspec.json.decode(_extract_json_block(response), type=schema))
+            await self._cache_response(cache_key, result)
+            return result
+        
+        # A concurrent caller for the same key waits on the same request
+        return await self._inflight.do(cache_key, fetch)
+
     async def analyze_code(self, code: str) -> Dict[str, Any]:
         """Analyze code and provide insights."""
         cache_key = self._generate_cache_key(code, 'code_analysis')
@@ -139,40 +378,86 @@ class GroqClient:
             return cached
         
         # Prepare prompt
-        prompt = self.templates.code_analysis().format(code=code)
+        prompt = self._code_prefix + code + self._code_suffix
         
         try:
-            # Get response from Groq
-            response = await self._make_groq_request(prompt)
-            
-            # Parse and structure the response
-            analysis = {
-                'summary': '',
-                'issues': [],
-                'recommendations': [],
-                'performance': []
-            }
-            
-            # Process the response into structured format
-            # (Implementation depends on the actual response format)
-            # This is a simplified example
-            analysis = json.loads(response)
+            return await self._request_validated(cache_key, prompt, CodeAnalysis)
             
-            # Cache the result
-            self._cache_response(cache_key, analysis)
+        except Exception as e:
+            logger.error("Error analyzing code: %s", e)
+            raise
+
+    async def analyze_code_batch(self, codes: List[str]) -> List[Dict[str, Any]]:
+        """Analyze several snippets with one Groq request per batch."""
+        cache_keys = [self._generate_cache_key(code, 'code_analysis') for code in codes]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(codes)
+        
+        # Serve cache hits first so only misses are sent
+        pending = []
+        for i, cache_key in enumerate(cache_keys):
+            cached = await self._get_cached_response(cache_key)
+            if cached:
+                results[i] = cached
+            else:
+                pending.append(i)
+        
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                snippets = "\n\n".join(
+                    f"[{position}] {codes[i]}" for position, i in enumerate(batch, 1)
+                )
+                prompt = self.templates.batch_code_analysis().format(
+                    batch_size=len(batch),
+                    snippets=snippets
+                )
+                
+                # One round-trip for the whole batch, split back out by index
+                response = await self._make_groq_request(prompt)
+                decoded = msgspec.json.decode(
+                    _extract_json_block(response), type=List[BatchCodeAnalysis]
+                )
+                analyses = {}
+                for item in decoded:
+                    # Cache entries share analyze_code's shape, so drop the batch index
+                    analysis = msgspec.to_builtins(item)
+                    del analysis['index']
+                    analyses[item.index] = analysis
+                
+                for position, i in enumerate(batch, 1):
+                    analysis = analyses.get(position)
+                    if analysis is None:
+                        raise ValueError(f"Batch response is missing snippet [{position}]")
+                    await self._cache_response(cache_keys[i], analysis)
+                    results[i] = analysis
             
-            return analysis
+            return results
             
         except Exception as e:
-            logger.error(f"Error analyzing code: {str(e)}")
+            logger.error("Error analyzing code batch: %s", e)
             raise
 
+    async def analyze_many(
+        self,
+        items: List[Any],
+        kind: str = 'code_analysis'
+    ) -> List[Any]:
+        """Run independent requests concurrently, bounded by max_concurrency."""
+        handlers = {
+            'code_analysis': self.analyze_code,
+            'pr_analysis': self.analyze_pr,
+            'documentation': self.generate_documentation
+        }
+        if kind not in handlers:
+            raise ValueError(f"Unsupported analysis kind: {kind}")
+        
+        # Failed items come back as exceptions in their slot
+        tasks = [handlers[kind](item) for item in items]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
     async def analyze_pr(self, pr_content: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a pull request."""
-        cache_key = self._generate_cache_key(
-            json.dumps(pr_content),
-            'pr_analysis'
-        )
+        cache_key = self._generate_cache_key(pr_content, 'pr_analysis')
         
         # Check cache
         cached = await self._get_cached_response(cache_key)
@@ -180,31 +465,13 @@ class GroqClient:
             return cached
         
         # Prepare prompt
-        prompt = self.templates.pr_analysis().format(pr_content=json.dumps(pr_content))
+        prompt = self._pr_prefix + orjson.dumps(pr_content).decode() + self._pr_suffix
         
         try:
-            # Get response from Groq
-            response = await self._make_groq_request(prompt)
-            
-            # Parse and structure the response
-            analysis = {
-                'summary': '',
-                'impact': '',
-                'security': [],
-                'quality': '',
-                'recommendations': []
-            }
-            
-            # Process the response into structured format
-            analysis = json.loads(response)
-            
-            # Cache the result
-            self._cache_response(cache_key, analysis)
-            
-            return analysis
+            return await self._request_validated(cache_key, prompt, PRAnalysis)
             
         except Exception as e:
-            logger.error(f"Error analyzing PR: {str(e)}")
+            logger.error("Error analyzing PR: %s", e)
             raise
 
     async def generate_documentation(self, code: str) -> Dict[str, Any]:
@@ -217,31 +484,13 @@ class GroqClient:
             return cached
         
         # Prepare prompt
-        prompt = self.templates.documentation_generation().format(code=code)
+        prompt = self._docs_prefix + code + self._docs_suffix
         
         try:
-            # Get response from Groq
-            response = await self._make_groq_request(prompt)
-            
-            # Parse and structure the response
-            documentation = {
-                'description': '',
-                'parameters': [],
-                'returns': '',
-                'examples': [],
-                'notes': []
-            }
-            
-            # Process the response into structured format
-            documentation = json.loads(response)
-            
-            # Cache the result
-            self._cache_response(cache_key, documentation)
-            
-            return documentation
+            return await self._request_validated(cache_key, prompt, Documentation)
             
         except Exception as e:
-            logger.error(f"Error generating documentation: {str(e)}")
+            logger.error("Error generating documentation: %s", e)
             raise
 
     async def some_method(self):
@@ -249,15 +498,43 @@ class GroqClient:
             # Example code to execute
             await asyncio.sleep(1)
         except (aiohttp.ClientError, AttributeError) as e:
-            logger.error(f"An error occurred: {e}")
+            logger.error("An error occurred: %s", e)
             # Handle the exception appropriately
             print(f"An error occurred: {e}")
 
+    async def cleanup(self):
+        """Close the Groq client's HTTP connections."""
+        await self.client.close()
+        # The SDK closes an injected client too; closing twice is a no-op
+        await self._http.aclose()
+
     def clear_cache(self):
         """Clear the response cache."""
         self._response_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
         logger.info("Cache cleared")
 
+    async def clear_backend_cache(self, analysis_type: Optional[str] = None) -> int:
+        """Remove shared cache entries, optionally for one analysis type."""
+        if self.cache_backend is None:
+            return 0
+        
+        pattern = f"{self.CACHE_KEY_PREFIX}{analysis_type or '*'}:*"
+        removed = 0
+        keys = []
+        # SCAN + UNLINK avoids blocking Redis the way KEYS + DEL would
+        async for key in self.cache_backend.scan_iter(match=pattern, count=500):
+            keys.append(key)
+            if len(keys) >= 500:
+                removed += await self.cache_backend.unlink(*keys)
+                keys.clear()
+        if keys:
+            removed += await self.cache_backend.unlink(*keys)
+        
+        logger.info("Removed %s shared cache entries", removed)
+        return removed
+
 # Example usage
 if __name__ == "__main__":
     async def main():
@@ -272,10 +549,10 @@ if __name__ == "__main__":
         
         try:
             analysis = await client.analyze_code(code)
-            print("Code Analysis:", json.dumps(analysis, indent=2))
+            print("Code Analysis:", orjson.dumps(analysis, option=orjson.OPT_INDENT_2).decode())
             
             docs = await client.generate_documentation(code)
-            print("Documentation:", json.dumps(docs, indent=2))
+            print("Documentation:", orjson.dumps(docs, option=orjson.OPT_INDENT_2).decode())
             
         except Exception as e:
             print(f"Error: {e}")
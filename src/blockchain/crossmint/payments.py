@@ -1,18 +1,33 @@
+"""Crossmint payment orders (USDC and card) over the shared HTTP session.
+
+The application entry point (src/main.py) runs on uvloop, which the
+throughput figures for concurrent order creation and polling assume.
+"""
 from typing import Optional, Dict, Any
 from decimal import Decimal
-from enum import Enum
+from enum import StrEnum
 import aiohttp
+import orjson
+import yarl
+from types import MappingProxyType
 import logging
 import asyncio
-import backoff
+
+from blockchain.crossmint.session import (
+    GetResponseCache,
+    get_shared_session,
+    release_shared_session,
+    request_retrying
+)
+from resilience import RETRY_AFTER_STATUSES, CircuitBreaker, honor_retry_after
 
 logger = logging.getLogger(__name__)
 
-class PaymentMethod(Enum):
+class PaymentMethod(StrEnum):
     USDC = "usdc"
     STRIPE = "stripe-payment-element"
     
-class PaymentStatus(Enum):
+class PaymentStatus(StrEnum):
     QUOTE = "quote"
     PAYMENT = "payment"
     DELIVERY = "delivery"
@@ -24,51 +39,108 @@ class PaymentError(Exception):
     pass
 
 class CrossmintPaymentManager:
+    # Statuses treated as success
+    _OK = frozenset({200, 201})
+
     def __init__(
         self,
         api_key: str,
-        environment: str = "staging"
+        environment: str = "staging",
+        session: Optional[aiohttp.ClientSession] = None,
+        patch_card_recipient: bool = False  # Fallback for tenants rejecting recipient on create
     ):
         self.api_key = api_key
         self.base_url = f"https://{environment}.crossmint.com/api/2022-06-09"
-        self.session: Optional[aiohttp.ClientSession] = None
+        self._base = yarl.URL(self.base_url)
+        # Built once and shared read-only by every request
+        self.headers = MappingProxyType({
+            "x-api-key": self.api_key,
+            "Content-Type": "application/json"
+        })
+        # Injected sessions are owned (and closed) by the caller
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        self._get_cache = GetResponseCache()
+        self._breaker = CircuitBreaker("crossmint-payments", (aiohttp.ClientError,))
+        self.patch_card_recipient = patch_card_recipient
 
     async def initialize(self):
-        """Initialize the HTTP session."""
-        self.session = aiohttp.ClientSession(
-            headers={
-                "x-api-key": self.api_key,
-                "Content-Type": "application/json"
-            }
-        )
+        """Attach the shared pooled HTTP session."""
+        if self.session is None or (self._owns_session and self.session.closed):
+            if self.session is not None:
+                # Give up the hold on a session that was closed under us
+                await release_shared_session()
+            self.session = get_shared_session()
 
     async def cleanup(self):
         """Cleanup resources."""
-        if self.session:
-            await self.session.close()
-
-    @backoff.on_exception(
-        backoff.expo,
-        aiohttp.ClientError,
-        max_tries=3
-    )
+        # Only this manager's hold is released; the session closes after its last user
+        if self._owns_session and self.session is not None:
+            self.session = None
+            await release_shared_session()
+
     async def _make_request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[Dict] = None
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> Dict:
+        """Make an API request, reusing recent responses for GETs."""
+        if method != "GET":
+            response = await self._send_request(method, endpoint, data, params)
+            # A write may change anything a cached GET returned
+            self._get_cache.clear()
+            return response
+        
+        return await self._get_cache.fetch(
+            endpoint,
+            params,
+            lambda: self._send_request(method, endpoint, data, params)
+        )
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None
     ) -> Dict:
         """Make API request with retry logic."""
-        if not self.session:
+        # Writes are only replayed when the server cannot have processed them
+        async for attempt in request_retrying(method):
+            with attempt:
+                # An open breaker raises UpstreamUnavailable, which is not retried
+                async with self._breaker.guard():
+                    response_data = await self._send_once(method, endpoint, data, params)
+        return response_data
+
+    async def _send_once(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> Dict:
+        """Send a single API request."""
+        if self.session is None or self.session.closed:
             await self.initialize()
 
-        url = f"{self.base_url}/{endpoint}"
+        url = self._base / endpoint
+        body = orjson.dumps(data) if data is not None else None
         
-        async with self.session.request(method, url, json=data) as response:
-            if response.status not in {200, 201}:
-                error_data = await response.json()
+        async with self.session.request(
+            method, url, data=body, params=params, headers=self.headers
+        ) as response:
+            if response.status in RETRY_AFTER_STATUSES:
+                # Free the connection, wait out Retry-After, then let the policy retry
+                response.release()
+                await honor_retry_after(response.headers)
+                response.raise_for_status()
+            if response.status not in self._OK:
+                error_data = await response.json(loads=orjson.loads)
                 raise PaymentError(f"API request failed: {error_data.get('message', 'Unknown error')}")
-            return await response.json()
+            return await response.json(loads=orjson.loads)
 
     async def create_usdc_payment_order(
         self,
@@ -109,7 +181,7 @@ class CrossmintPaymentManager:
                 raise PaymentError("No serialized transaction in response")
 
         except Exception as e:
-            logger.error(f"Error creating USDC order: {str(e)}")
+            logger.error("Error creating USDC order: %s", e)
             raise PaymentError(f"Failed to create USDC order: {str(e)}")
 
     async def create_card_payment_intent(
@@ -122,25 +194,27 @@ class CrossmintPaymentManager:
         Frontend will handle the actual payment using Stripe Elements.
         """
         try:
-            # Initial order creation
             order_data = {
                 "payment": {
-                    "method": "stripe-payment-element"
+                    "method": PaymentMethod.STRIPE
                 },
                 "lineItems": {
                     "collectionLocator": f"crossmint:{collection_id}"
                 }
             }
+            # Attach the recipient up front to save a round-trip
+            if not self.patch_card_recipient:
+                order_data["recipient"] = {"email": email}
 
             response = await self._make_request("POST", "orders", order_data)
             order_id = response["orderId"]
 
-            # Add recipient email
-            await self._make_request(
-                "PATCH",
-                f"orders/{order_id}",
-                {"recipient": {"email": email}}
-            )
+            if self.patch_card_recipient:
+                await self._make_request(
+                    "PATCH",
+                    f"orders/{order_id}",
+                    {"recipient": {"email": email}}
+                )
 
             # Return data needed for Stripe Payment Element
             return {
@@ -150,7 +224,7 @@ class CrossmintPaymentManager:
             }
 
         except Exception as e:
-            logger.error(f"Error creating card payment intent: {str(e)}")
+            logger.error("Error creating card payment intent: %s", e)
             raise PaymentError(f"Failed to create card payment intent: {str(e)}")
 
     async def get_order_status(self, order_id: str) -> Dict[str, Any]:
@@ -158,7 +232,7 @@ class CrossmintPaymentManager:
         try:
             return await self._make_request("GET", f"orders/{order_id}")
         except Exception as e:
-            logger.error(f"Error getting order status: {str(e)}")
+            logger.error("Error getting order status: %s", e)
             raise PaymentError(f"Failed to get order status: {str(e)}")
 
 # Example usage (Backend only - frontend handling would be separate)
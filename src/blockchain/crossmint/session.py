@@ -0,0 +1,125 @@
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+from fnmatch import fnmatchcase
+import aiohttp
+import logging
+from cachetools import TLRUCache
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
+
+from resilience import RETRY_AFTER_STATUSES, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_session_users = 0  # Managers holding the shared session; the last release closes it
+
+# Seconds a GET response may be reused, by endpoint pattern; others are not cached
+DEFAULT_GET_TTLS: Tuple[Tuple[str, float], ...] = (
+    ("orders/*", 5),
+    ("wallets/*/balances", 10),
+)
+
+# Methods that are safe to replay after any transport error
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+def _is_transient(error: BaseException) -> bool:
+    return isinstance(error, aiohttp.ClientError)
+
+def _was_not_processed(error: BaseException) -> bool:
+    # Only a failed connect or an explicit throttle guarantees no side effect
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return True
+    return (
+        isinstance(error, aiohttp.ClientResponseError)
+        and error.status in RETRY_AFTER_STATUSES
+    )
+
+def request_retrying(method: str) -> AsyncRetrying:
+    """Build the retry policy for one request; writes never replay after a possible send."""
+    should_retry = _is_transient if method in IDEMPOTENT_METHODS else _was_not_processed
+    return AsyncRetrying(
+        stop=stop_after_attempt(6),
+        wait=wait_exponential_jitter(initial=0.1, max=30),  # First retry after ~100 ms
+        retry=retry_if_exception(should_retry),
+        reraise=True
+    )
+
+def get_shared_session() -> aiohttp.ClientSession:
+    """Return the pooled session shared by the Crossmint managers, counting the caller as a user."""
+    global _shared_session, _shared_session_users
+    if _shared_session is None or _shared_session.closed:
+        # Keep-alive and DNS caching amortize TLS setup across requests
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=32,
+            ttl_dns_cache=300,
+            keepalive_timeout=75
+        )
+        _shared_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30, connect=5)
+        )
+        logger.debug("Created shared Crossmint HTTP session")
+    _shared_session_users += 1
+    return _shared_session
+
+async def release_shared_session():
+    """Drop one user of the shared session, closing it once nobody holds it."""
+    global _shared_session, _shared_session_users
+    _shared_session_users = max(0, _shared_session_users - 1)
+    if _shared_session_users:
+        return
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+
+class GetResponseCache:
+    """Short-lived cache for idempotent GETs that also shares in-flight requests."""
+
+    def __init__(
+        self,
+        ttls: Tuple[Tuple[str, float], ...] = DEFAULT_GET_TTLS,
+        maxsize: int = 1024
+    ):
+        self.ttls = ttls
+        self._cache = TLRUCache(maxsize=maxsize, ttu=self._expires_at)
+        self._inflight = SingleFlight()
+
+    def ttl_for(self, endpoint: str) -> float:
+        """Return how long a response for this endpoint may be reused."""
+        for pattern, ttl in self.ttls:
+            if fnmatchcase(endpoint, pattern):
+                return ttl
+        return 0
+
+    def _expires_at(self, key: Tuple, value: Any, now: float) -> float:
+        return now + self.ttl_for(key[0])
+
+    async def fetch(
+        self,
+        endpoint: str,
+        params: Optional[Mapping[str, str]],
+        request: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """Serve a cached response or run the request once for all concurrent callers."""
+        key = (endpoint, tuple(sorted(params.items())) if params else ())
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> Dict:
+            response = await request()
+            if self.ttl_for(endpoint) > 0:
+                self._cache[key] = response
+            return response
+
+        # Concurrent pollers of the same resource wait on one upstream call
+        return await self._inflight.do(key, fetch)
+
+    def clear(self):
+        """Drop every cached response."""
+        self._cache.clear()
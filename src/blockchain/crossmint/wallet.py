@@ -1,17 +1,33 @@
+"""Crossmint custodial wallet management over the shared HTTP session.
+
+The application entry point (src/main.py) runs on uvloop, which the
+throughput figures for concurrent balance and transaction polling assume.
+"""
 from typing import Optional, Dict, List, Any
 import aiohttp
+import orjson
+import yarl
+from types import MappingProxyType
 import logging
-from datetime import datetime
 import asyncio
-from enum import Enum
-import backoff
+import random
+import time
+from enum import StrEnum
+
+from blockchain.crossmint.session import (
+    GetResponseCache,
+    get_shared_session,
+    release_shared_session,
+    request_retrying
+)
+from resilience import RETRY_AFTER_STATUSES, CircuitBreaker, honor_retry_after
 
 logger = logging.getLogger(__name__)
 
-class WalletType(Enum):
+class WalletType(StrEnum):
     SOLANA_CUSTODIAL = "solana-custodial-wallet"
 
-class TransactionStatus(Enum):
+class TransactionStatus(StrEnum):
     PENDING = "pending"
     SUCCESS = "success"
     FAILED = "failed"
@@ -21,14 +37,28 @@ class CrossmintWalletError(Exception):
     pass
 
 class WalletManager:
+    # Statuses treated as success
+    _OK = frozenset({200, 201})
+
     def __init__(
         self,
         api_key: str,
-        environment: str = "staging"  # or "production"
+        environment: str = "staging",  # or "production"
+        session: Optional[aiohttp.ClientSession] = None
     ):
         self.api_key = api_key
         self.base_url = f"https://{environment}.crossmint.com/api/v1-alpha2"
-        self.session: Optional[aiohttp.ClientSession] = None
+        self._base = yarl.URL(self.base_url)
+        # Built once and shared read-only by every request
+        self.headers = MappingProxyType({
+            "X-API-KEY": self.api_key,
+            "Content-Type": "application/json"
+        })
+        # Injected sessions are owned (and closed) by the caller
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        self._get_cache = GetResponseCache()
+        self._breaker = CircuitBreaker("crossmint-wallets", (aiohttp.ClientError,))
 
     async def __aenter__(self):
         await self.initialize()
@@ -39,46 +69,90 @@ class WalletManager:
 
     async def initialize(self):
         """Initialize the wallet manager."""
-        self.session = aiohttp.ClientSession(
-            headers={
-                "X-API-KEY": self.api_key,
-                "Content-Type": "application/json"
-            }
-        )
+        if self.session is None or (self._owns_session and self.session.closed):
+            if self.session is not None:
+                # Give up the hold on a session that was closed under us
+                await release_shared_session()
+            self.session = get_shared_session()
 
     async def cleanup(self):
         """Cleanup resources."""
-        if self.session:
-            await self.session.close()
-
-    @backoff.on_exception(
-        backoff.expo,
-        aiohttp.ClientError,
-        max_tries=3
-    )
+        # Only this manager's hold is released; the session closes after its last user
+        if self._owns_session and self.session is not None:
+            self.session = None
+            await release_shared_session()
+
     async def _make_request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[Dict] = None
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> Dict:
+        """Make an API request, reusing recent responses for GETs."""
+        if method != "GET":
+            response = await self._send_request(method, endpoint, data, params)
+            # A write may change anything a cached GET returned
+            self._get_cache.clear()
+            return response
+        
+        return await self._get_cache.fetch(
+            endpoint,
+            params,
+            lambda: self._send_request(method, endpoint, data, params)
+        )
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None
     ) -> Dict:
         """Make an API request with retry logic."""
-        if not self.session:
+        # Writes are only replayed when the server cannot have processed them
+        async for attempt in request_retrying(method):
+            with attempt:
+                # An open breaker raises UpstreamUnavailable, which is not retried
+                async with self._breaker.guard():
+                    response_data = await self._send_once(method, endpoint, data, params)
+        return response_data
+
+    async def _send_once(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> Dict:
+        """Send a single API request."""
+        if self.session is None or self.session.closed:
             await self.initialize()
 
-        url = f"{self.base_url}/{endpoint}"
+        url = self._base / endpoint
+        body = orjson.dumps(data) if data is not None else None
         
         try:
-            async with self.session.request(method, url, json=data) as response:
-                response_data = await response.json()
-                if response.status not in {200, 201}:
+            async with self.session.request(
+                method, url, data=body, params=params, headers=self.headers
+            ) as response:
+                if response.status in RETRY_AFTER_STATUSES:
+                    # Free the connection, wait out Retry-After, then let the policy retry
+                    response.release()
+                    await honor_retry_after(response.headers)
+                    response.raise_for_status()
+                response_data = await response.json(loads=orjson.loads)
+                if response.status not in self._OK:
                     raise CrossmintWalletError(
                         f"API request failed: {response_data.get('message', 'Unknown error')}"
                     )
                 return response_data
                 
+        except aiohttp.ClientError:
+            # Transport and throttling errors are left to the retry policy
+            raise
         except Exception as e:
-            logger.error(f"Request error: {str(e)}")
+            logger.error("Request error: %s", e)
             raise CrossmintWalletError(f"Request failed: {str(e)}")
 
     async def create_wallet(self, email: str) -> Dict[str, Any]:
@@ -87,16 +161,16 @@ class WalletManager:
         """
         try:
             payload = {
-                "type": WalletType.SOLANA_CUSTODIAL.value,
+                "type": WalletType.SOLANA_CUSTODIAL,
                 "linkedUser": f"email:{email}"
             }
 
             response = await self._make_request("POST", "wallets", payload)
-            logger.info(f"Created wallet for {email}")
+            logger.info("Created wallet for %s", email)
             return response
 
         except Exception as e:
-            logger.error(f"Error creating wallet: {str(e)}")
+            logger.error("Error creating wallet: %s", e)
             raise CrossmintWalletError(f"Failed to create wallet: {str(e)}")
 
     async def fund_wallet(
@@ -119,11 +193,11 @@ class WalletManager:
                 f"wallets/{wallet_locator}/balances",
                 payload
             )
-            logger.info(f"Funded wallet {wallet_locator} with {amount} {currency}")
+            logger.info("Funded wallet %s with %s %s", wallet_locator, amount, currency)
             return response
 
         except Exception as e:
-            logger.error(f"Error funding wallet: {str(e)}")
+            logger.error("Error funding wallet: %s", e)
             raise CrossmintWalletError(f"Failed to fund wallet: {str(e)}")
 
     async def get_balance(
@@ -137,12 +211,13 @@ class WalletManager:
         try:
             response = await self._make_request(
                 "GET",
-                f"wallets/{wallet_locator}/balances?currency={currency}"
+                f"wallets/{wallet_locator}/balances",
+                params={"currency": currency}
             )
             return response
 
         except Exception as e:
-            logger.error(f"Error getting balance: {str(e)}")
+            logger.error("Error getting balance: %s", e)
             raise CrossmintWalletError(f"Failed to get balance: {str(e)}")
 
     async def create_transaction(
@@ -165,11 +240,11 @@ class WalletManager:
                 f"wallets/{wallet_locator}/transactions",
                 payload
             )
-            logger.info(f"Created transaction for wallet {wallet_locator}")
+            logger.info("Created transaction for wallet %s", wallet_locator)
             return response
 
         except Exception as e:
-            logger.error(f"Error creating transaction: {str(e)}")
+            logger.error("Error creating transaction: %s", e)
             raise CrossmintWalletError(f"Failed to create transaction: {str(e)}")
 
     async def get_transaction_status(
@@ -188,29 +263,35 @@ class WalletManager:
             return response
 
         except Exception as e:
-            logger.error(f"Error getting transaction status: {str(e)}")
+            logger.error("Error getting transaction status: %s", e)
             raise CrossmintWalletError(f"Failed to get transaction status: {str(e)}")
 
     async def poll_transaction_status(
         self,
         wallet_locator: str,
         transaction_id: str,
-        interval: int = 3,
-        timeout: int = 60
+        interval: float = 3,  # Upper bound on the delay between polls
+        timeout: int = 60,
+        initial_interval: float = 0.2
     ) -> Dict[str, Any]:
         """
         Poll transaction status until completion or timeout.
         """
-        start_time = datetime.now()
+        # Back off exponentially so fast settlements return quickly
+        # without slow ones hammering the API
+        deadline = time.monotonic() + timeout
+        delay = initial_interval
         while True:
-            if (datetime.now() - start_time).seconds > timeout:
-                raise CrossmintWalletError("Transaction polling timeout")
-
             status = await self.get_transaction_status(wallet_locator, transaction_id)
-            if status["status"] in [TransactionStatus.SUCCESS.value, TransactionStatus.FAILED.value]:
+            if status["status"] in (TransactionStatus.SUCCESS, TransactionStatus.FAILED):
                 return status
 
-            await asyncio.sleep(interval)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CrossmintWalletError("Transaction polling timeout")
+
+            await asyncio.sleep(min(delay * random.uniform(0.8, 1.2), remaining))
+            delay = min(delay * 2, interval)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,52 +1,118 @@
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 import aiohttp
-import json
+import orjson
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import mmap
+import os
+import pickle
+import time
 from decimal import Decimal
+from types import MappingProxyType
 import backoff
 
+from resilience import (
+    RETRY_AFTER_STATUSES,
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    EndpointPool,
+    SingleFlight,
+    honor_retry_after
+)
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Request payload builders for each prioritization fee type
+_PRIORITY_FEE_BUILDERS = {
+    'auto': lambda value: 'auto',
+    'autoMultiplier': lambda value: {'autoMultiplier': value},
+    'jitoTipLamports': lambda value: {'jitoTipLamports': value},
+    'priorityLevelWithMaxLamports': lambda value: {'priorityLevelWithMaxLamports': value}
+}
+
+# Market info fields the swap endpoint reads back from routePlan
+_ROUTE_PLAN_FIELDS = ('id', 'label', 'inputMint', 'outputMint', 'inAmount', 'outAmount')
+
+# Solana RPC nodes take no Jupiter credentials
+_RPC_HEADERS = MappingProxyType({"Content-Type": "application/json"})
+
+DEFAULT_TOKEN_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "solanaprbot", "jupiter_tokens.pkl"
+)
+
+@dataclass(slots=True, frozen=True)
 class Token:
     address: str
     symbol: str
     decimals: int
     name: str
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Route:
-    in_amount: Decimal
-    out_amount: Decimal
+    in_amount_raw: int  # Base units, as returned by the API
+    out_amount_raw: int
     price_impact: float
-    market_infos: List[Dict]
+    market_infos: Tuple[Dict, ...]  # Trimmed to _ROUTE_PLAN_FIELDS
     slippage: float
     fees: List[Dict]
 
-@dataclass
+    @property
+    def in_amount(self) -> Decimal:
+        return Decimal(self.in_amount_raw)
+
+    @property
+    def out_amount(self) -> Decimal:
+        return Decimal(self.out_amount_raw)
+
+@dataclass(slots=True, frozen=True)
 class SwapResult:
     transaction_id: str
     input_token: Token
     output_token: Token
-    input_amount: Decimal
-    output_amount: Decimal
+    input_amount_raw: int  # Base units
+    output_amount_raw: int
     price_impact: float
     route: Route
-    timestamp: datetime
-@dataclass
+    timestamp_ns: int  # Wall clock at confirmation, from time.time_ns()
+
+    @property
+    def input_amount(self) -> Decimal:
+        """Input amount in base units, as before."""
+        return Decimal(self.input_amount_raw)
+
+    @property
+    def output_amount(self) -> Decimal:
+        """Output amount in base units, as before."""
+        return Decimal(self.output_amount_raw)
+
+    @property
+    def input_ui_amount(self) -> Decimal:
+        """Input amount in whole tokens, scaled by the token's decimals."""
+        return Decimal(self.input_amount_raw).scaleb(-self.input_token.decimals)
+
+    @property
+    def output_ui_amount(self) -> Decimal:
+        """Output amount in whole tokens, scaled by the token's decimals."""
+        return Decimal(self.output_amount_raw).scaleb(-self.output_token.decimals)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Local time the swap was confirmed."""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
+
+@dataclass(slots=True, frozen=True)
 class DynamicSlippageConfig:
     min_bps: int
     max_bps: int
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PriorityFeeConfig:
     type: str  # 'auto', 'autoMultiplier', 'jitoTipLamports', 'priorityLevelWithMaxLamports'
     value: Any  # Could be int for jitoTipLamports, float for autoMultiplier, etc.
 
-@dataclass
+@dataclass(slots=True)
 class SwapConfig:
     wrap_unwrap_sol: bool = True
     use_shared_accounts: bool = True
@@ -65,21 +131,114 @@ class JupiterSwapError(Exception):
     """Base exception for Jupiter swap operations."""
     pass
 
+class JupiterOverloadError(JupiterSwapError):
+    """Raised when Jupiter throttles or reports overload."""
+    pass
+
+class JupiterServerError(JupiterSwapError):
+    """Raised on other 5xx answers: worth a retry, but not a load signal."""
+    pass
+
+# Gateway errors mean the upstream is saturated, same as an explicit throttle
+_OVERLOAD_STATUSES = RETRY_AFTER_STATUSES | {502, 504}
+
+def _bucket(amount: Decimal, digits: Optional[int]) -> Decimal:
+    """Round an amount to significant digits so nearby sizes share a cached quote."""
+    if digits is None or not amount:
+        return amount
+    return round(amount, digits - 1 - amount.adjusted())
+
+def _parse_route(route_data: dict) -> Route:
+    """Build a route from quote JSON, keeping only the fields swaps send back."""
+    return Route(
+        in_amount_raw=int(route_data['inAmount']),
+        out_amount_raw=int(route_data['outAmount']),
+        price_impact=float(route_data['priceImpact']),
+        market_infos=tuple(
+            {key: info[key] for key in _ROUTE_PLAN_FIELDS if key in info}
+            for info in route_data['marketInfos']
+        ),
+        slippage=float(route_data['slippage']),
+        fees=route_data['fees']
+    )
+
+def _parse_routes(response: dict) -> List[Route]:
+    """Build every route in a quote response."""
+    return [_parse_route(route_data) for route_data in response['routes']]
+
 class SwapManager:
     def __init__(
         self,
         api_key: str,
-        rpc_url: str,
-        default_slippage: float = 0.5  # 0.5%
+        rpc_urls: Sequence[str],
+        default_slippage: float = 0.5,  # 0.5%
+        quote_ttl: float = 10.0,  # Seconds a quote or price may be reused
+        quote_bucket_digits: int = 3,  # Significant digits shared by cached quotes
+        rate_ttl: float = 5.0,  # Seconds an observed exchange rate serves price reads
+        token_cache_path: Optional[str] = DEFAULT_TOKEN_CACHE_PATH,  # None disables persistence
+        token_cache_max_age: float = 24 * 3600,
+        preload_tokens: bool = True,  # False fetches token metadata only as swaps need it
+        session: Optional[aiohttp.ClientSession] = None,
+        rpc_session: Optional[aiohttp.ClientSession] = None  # Defaults to session
     ):
         self.api_key = api_key
-        self.rpc_url = rpc_url
+        # Failing or throttled RPC nodes are parked and the next one takes over
+        self.rpc_pool = EndpointPool(rpc_urls)
         self.default_slippage = default_slippage
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.token_cache: Dict[str, Token] = {}
+        # Injected sessions are owned (and closed) by the caller
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        # Kept apart from the REST pool so slow RPC lookups can't hold its slots
+        self.rpc_session: Optional[aiohttp.ClientSession] = rpc_session
+        # Sent per request so a shared session carries no Jupiter credentials
+        self.headers = MappingProxyType({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        # Token metadata by mint address, one dict per field
+        self._decimals: Dict[str, int] = {}
+        self._symbols: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self.token_cache_path = token_cache_path
+        self.token_cache_max_age = token_cache_max_age
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.preload_tokens = preload_tokens
+        self._token_inflight = SingleFlight()
+        
+        # Short-lived quote/price cache with in-flight request sharing
+        self.quote_ttl = quote_ttl
+        self.quote_bucket_digits = quote_bucket_digits
+        self._quote_cache: Dict[Tuple, Tuple[float, dict]] = {}
+        self._quote_inflight = SingleFlight()
+        
+        # Last observed rate per pair: (out/in rate, price impact, input amount, monotonic time)
+        self.rate_ttl = rate_ttl
+        self._rate_cache: Dict[Tuple[str, str], Tuple[Decimal, float, Decimal, float]] = {}
+        
+        # Shrinks on 429/503 only, so application errors don't throttle us
+        self._limiter = AdaptiveConcurrencyLimiter(
+            (JupiterOverloadError,),
+            initial_limit=8,
+            min_limit=2,
+            max_limit=32
+        )
+        
+        # Open after repeated overload or transport failures, so a Jupiter incident
+        # fails commands fast instead of each one waiting out its retries
+        self._breaker = CircuitBreaker(
+            "jupiter",
+            (JupiterOverloadError, aiohttp.ClientError),
+            fail_max=5,
+            reset_timeout=30
+        )
         
         # Base API URLs
         self.api_url = "https://quote-api.jup.ag/v6"
+        # Fixed endpoints resolved once; parameterized paths are formatted per call
+        self._urls = {
+            endpoint: f"{self.api_url}/{endpoint}"
+            for endpoint in ('quote', 'swap', 'price', 'tokens')
+        }
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -92,73 +251,312 @@ class SwapManager:
 
     async def initialize(self):
         """Initialize the swap manager."""
-        self.session = aiohttp.ClientSession(
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-        )
-        # Initialize token list
-        await self._update_token_cache()
+        if self.session is None or (self._owns_session and self.session.closed):
+            connector = aiohttp.TCPConnector(
+                limit=32,
+                limit_per_host=16,
+                ttl_dns_cache=300,
+                keepalive_timeout=75
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                # aiohttp encodes the serializer's str itself, so decode orjson's bytes
+                json_serialize=lambda obj: orjson.dumps(obj).decode()
+            )
+        # Warm restarts reuse the persisted token list and refresh it in the background
+        if await asyncio.to_thread(self._load_token_cache):
+            if self.preload_tokens:
+                self._refresh_task = asyncio.create_task(self._refresh_token_cache())
+        elif self.preload_tokens:
+            await self._update_token_cache()
 
     async def cleanup(self):
         """Cleanup resources."""
-        if self.session:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._owns_session and self.session:
             await self.session.close()
+            self.session = None
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        data: Optional[dict] = None
+    ) -> dict:
+        """Make an API request with retry logic."""
+        try:
+            return await self._send_request(method, endpoint, params, data)
+        except JupiterSwapError:
+            raise
+        except Exception as e:
+            logger.error(f"Request error: {str(e)}")
+            raise JupiterSwapError(f"Request failed: {str(e)}")
 
+    # Only throttling, server errors and transport failures are retried; 4xx answers are final.
+    # Full jitter spreads retries out, on top of any Retry-After wait already taken.
     @backoff.on_exception(
         backoff.expo,
-        (aiohttp.ClientError, JupiterSwapError),
-        max_tries=3
+        (JupiterOverloadError, JupiterServerError, aiohttp.ClientError),
+        max_tries=4,
+        jitter=backoff.full_jitter
     )
-    async def _make_request(
+    async def _send_request(
         self,
         method: str,
         endpoint: str,
         params: Optional[dict] = None,
         data: Optional[dict] = None
     ) -> dict:
-        """Make an API request with retry logic."""
+        """Send a single API request."""
         if not self.session:
             await self.initialize()
 
-        url = f"{self.api_url}/{endpoint}"
+        url = self._urls.get(endpoint) or f"{self.api_url}/{endpoint}"
         
-        try:
+        async with self._breaker.guard(), self._limiter.slot():
             async with self.session.request(
                 method,
                 url,
                 params=params,
-                json=data
+                headers=self.headers,
+                # Pre-encoded bytes skip aiohttp's str round-trip for swap bodies
+                data=orjson.dumps(data) if data is not None else None
             ) as response:
+                # Only overload shrinks the concurrency limit; Retry-After counts on 429/503
+                if response.status in _OVERLOAD_STATUSES:
+                    response.release()
+                    if response.status in RETRY_AFTER_STATUSES:
+                        await honor_retry_after(response.headers)
+                    raise JupiterOverloadError(f"Jupiter overloaded (HTTP {response.status})")
+                if response.status >= 500:
+                    response.release()
+                    raise JupiterServerError(f"Jupiter server error (HTTP {response.status})")
+                # Parse raw bytes directly; the token list alone is megabytes
+                payload = orjson.loads(await response.read())
                 if response.status not in {200, 201}:
-                    error_data = await response.json()
                     raise JupiterSwapError(
-                        f"API request failed: {error_data.get('message', 'Unknown error')}"
+                        f"API request failed: {payload.get('message', 'Unknown error')}"
                     )
-                return await response.json()
-        except Exception as e:
-            logger.error(f"Request error: {str(e)}")
-            raise JupiterSwapError(f"Request failed: {str(e)}")
+                return payload
+
+    # Each try already walks the whole pool; jittered rounds keep a pool-wide outage from
+    # turning into a retry storm, and a fully parked pool fails fast with UpstreamUnavailable
+    @backoff.on_exception(
+        backoff.expo,
+        JupiterOverloadError,
+        max_tries=3,
+        factor=0.1,
+        max_value=2.0,
+        jitter=backoff.full_jitter
+    )
+    async def _rpc_call(self, method: str, params: Optional[list] = None) -> Any:
+        """Send a Solana JSON-RPC request, failing over across the RPC pool."""
+        if not self.session:
+            await self.initialize()
+        session = self.rpc_session or self.session
+
+        body = orjson.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []})
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.rpc_pool.urls)):
+            url = self.rpc_pool.next()
+            try:
+                async with session.post(url, data=body, headers=_RPC_HEADERS) as response:
+                    if response.status in RETRY_AFTER_STATUSES or response.status >= 500:
+                        raise JupiterOverloadError(f"RPC endpoint overloaded (HTTP {response.status})")
+                    payload = orjson.loads(await response.read())
+            except (JupiterOverloadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.rpc_pool.record_failure(url)
+                last_error = e
+                continue
+
+            self.rpc_pool.record_success(url)
+            if 'error' in payload:
+                raise JupiterSwapError(f"RPC {method} failed: {payload['error'].get('message')}")
+            return payload['result']
+
+        raise JupiterOverloadError(f"All RPC endpoints failed for {method}: {last_error}")
+
+    async def _cached_get(
+        self,
+        key: Tuple,
+        endpoint: str,
+        params: dict,
+        parse: Optional[Callable[[dict], Any]] = None  # Cache the parsed value, not the raw JSON
+    ) -> Any:
+        """GET through the quote cache; concurrent callers for a key share one request."""
+        entry = self._quote_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.quote_ttl:
+            return entry[1]
+        
+        async def fetch() -> Any:
+            response = await self._make_request('GET', endpoint, params=params)
+            if parse is not None:
+                response = parse(response)
+            self._store_quote(key, response)
+            return response
+        
+        return await self._quote_inflight.do(key, fetch)
+
+    def _store_quote(self, key: Tuple, response: Any):
+        """Cache a response, pruning expired entries once the cache grows."""
+        now = time.monotonic()
+        if len(self._quote_cache) >= 1024:
+            self._quote_cache = {
+                k: v for k, v in self._quote_cache.items()
+                if now - v[0] < self.quote_ttl
+            }
+        self._quote_cache[key] = (now, response)
+
+    def _quote_key(
+        self,
+        input_token: str,
+        output_token: str,
+        amount: Decimal,
+        slippage: float,
+        exact: bool = False
+    ) -> Tuple:
+        """Build the quote cache key, bucketing the amount unless exact."""
+        digits = None if exact else self.quote_bucket_digits
+        return ('quote', input_token, output_token, _bucket(amount, digits), slippage)
+
+    def invalidate_quote(
+        self,
+        input_token: str,
+        output_token: str,
+        amount: Decimal,
+        slippage: Optional[float] = None
+    ):
+        """Drop cached quotes for a pair and amount, e.g. after a rejected swap."""
+        slippage = slippage or self.default_slippage
+        for exact in (True, False):
+            self._quote_cache.pop(
+                self._quote_key(input_token, output_token, amount, slippage, exact),
+                None
+            )
 
     async def _update_token_cache(self):
         """Update local token cache."""
         try:
             response = await self._make_request('GET', 'tokens')
             
+            decimals, symbols, names = self._decimals, self._symbols, self._names
             for token_data in response:
-                token = Token(
-                    address=token_data['address'],
-                    symbol=token_data['symbol'],
-                    decimals=token_data['decimals'],
-                    name=token_data['name']
-                )
-                self.token_cache[token.address] = token
+                address = token_data['address']
+                decimals[address] = token_data['decimals']
+                symbols[address] = token_data['symbol']
+                names[address] = token_data['name']
+            
+            # Copied on the loop: _get_token keeps adding entries while the thread pickles
+            snapshot = (time.time(), dict(decimals), dict(symbols), dict(names))
+            await asyncio.to_thread(self._save_token_cache, snapshot)
                 
         except Exception as e:
             logger.error(f"Error updating token cache: {str(e)}")
             raise JupiterSwapError(f"Failed to update token cache: {str(e)}")
 
+    async def _refresh_token_cache(self):
+        """Refresh the token list in the background, keeping the loaded copy on failure."""
+        try:
+            await self._update_token_cache()
+        except JupiterSwapError as e:
+            logger.warning(f"Background token cache refresh failed: {str(e)}")
+
+    def _load_token_cache(self) -> bool:
+        """Load persisted token metadata if present and fresh."""
+        if not self.token_cache_path:
+            return False
+        try:
+            with open(self.token_cache_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    fetched_at, decimals, symbols, names = pickle.loads(mapped)
+        except Exception as e:
+            # Missing, truncated or foreign files all just mean a cold start
+            logger.debug(f"No usable token cache at {self.token_cache_path}: {str(e)}")
+            return False
+        
+        if time.time() - fetched_at > self.token_cache_max_age:
+            return False
+        
+        self._decimals, self._symbols, self._names = decimals, symbols, names
+        logger.info(f"Loaded {len(decimals)} tokens from {self.token_cache_path}")
+        return True
+
+    def _save_token_cache(self, snapshot: Tuple[float, Dict, Dict, Dict]):
+        """Persist a token metadata snapshot atomically for the next start."""
+        if not self.token_cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.token_cache_path), exist_ok=True)
+            tmp_path = f"{self.token_cache_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=5)
+            os.replace(tmp_path, self.token_cache_path)
+        except Exception as e:
+            # Persistence only speeds up restarts; never fail the refresh over it
+            logger.warning(f"Could not persist token cache: {str(e)}")
+
+    def get_token(self, address: str) -> Token:
+        """Build a Token from the cached metadata for a mint address."""
+        return Token(
+            address=address,
+            symbol=self._symbols[address],
+            decimals=self._decimals[address],
+            name=self._names[address]
+        )
+
+    async def _get_token(self, address: str) -> Token:
+        """Return a token, fetching and memoizing metadata for mints not yet cached."""
+        if address in self._decimals:
+            return self.get_token(address)
+        
+        async def fetch() -> Token:
+            try:
+                token_data = await self._make_request('GET', f'tokens/{address}')
+            except Exception as e:
+                raise JupiterSwapError(f"Unknown token {address}: {str(e)}")
+            self._decimals[address] = token_data['decimals']
+            self._symbols[address] = token_data['symbol']
+            self._names[address] = token_data['name']
+            return self.get_token(address)
+        
+        # Concurrent swaps on the same new mint share one lookup
+        return await self._token_inflight.do(address, fetch)
+
+    def _record_rate(
+        self,
+        input_token: str,
+        output_token: str,
+        in_amount: Decimal,
+        out_amount: Decimal,
+        price_impact: float
+    ):
+        """Remember the exchange rate seen for a pair at a given size."""
+        if in_amount > 0:
+            self._rate_cache[(input_token, output_token)] = (
+                out_amount / in_amount, price_impact, in_amount, time.monotonic()
+            )
+
+    def _cached_rate(
+        self,
+        input_token: str,
+        output_token: str,
+        amount: Decimal
+    ) -> Optional[Tuple[Decimal, float]]:
+        """Estimate output from a recent rate, if the amount is close enough in size."""
+        entry = self._rate_cache.get((input_token, output_token))
+        if entry is None:
+            return None
+        rate, price_impact, observed_amount, observed_at = entry
+        if time.monotonic() - observed_at >= self.rate_ttl:
+            return None
+        # The pool curve is concave, so the rate only holds near the observed size;
+        # much larger trades slip further and need a real quote
+        if amount > 2 * observed_amount:
+            return None
+        return rate * amount, price_impact
+
     async def get_token_price(
         self,
         input_token: str,
@@ -167,8 +565,19 @@ class SwapManager:
     ) -> Tuple[Decimal, float]:
         """Get token price and price impact."""
         try:
-            response = await self._make_request(
-                'GET',
+            estimate = self._cached_rate(input_token, output_token, amount)
+            if estimate is not None:
+                return estimate
+            
+            key = (
+                'price',
+                input_token,
+                output_token,
+                _bucket(amount, self.quote_bucket_digits),
+                self.default_slippage
+            )
+            response = await self._cached_get(
+                key,
                 'price',
                 params={
                     'inputMint': input_token,
@@ -178,51 +587,84 @@ class SwapManager:
                 }
             )
             
-            return Decimal(response['outAmount']), float(response['priceImpact'])
+            out_amount = Decimal(response['outAmount'])
+            price_impact = float(response['priceImpact'])
+            self._record_rate(input_token, output_token, amount, out_amount, price_impact)
+            return out_amount, price_impact
             
         except Exception as e:
             logger.error(f"Error getting token price: {str(e)}")
             raise JupiterSwapError(f"Failed to get token price: {str(e)}")
 
+    def _quote_params(
+        self,
+        input_token: str,
+        output_token: str,
+        amount: Decimal,
+        slippage: float
+    ) -> dict:
+        """Query parameters for the quote endpoint."""
+        return {
+            'inputMint': input_token,
+            'outputMint': output_token,
+            'amount': str(amount),
+            'slippage': slippage,
+            'feeBps': 4
+        }
+
+    async def _get_quote_raw(
+        self,
+        input_token: str,
+        output_token: str,
+        amount: Decimal,
+        slippage: float
+    ) -> dict:
+        """Fetch a fresh quote, returning the JSON untouched so it can be forwarded."""
+        return await self._make_request(
+            'GET',
+            'quote',
+            params=self._quote_params(input_token, output_token, amount, slippage)
+        )
+
     async def get_swap_routes(
         self,
         input_token: str,
         output_token: str,
         amount: Decimal,
-        slippage: Optional[float] = None
+        slippage: Optional[float] = None,
+        exact: bool = False  # Only share quotes for this exact amount
     ) -> List[Route]:
         """Get optimized swap routes."""
         try:
-            response = await self._make_request(
-                'GET',
+            slippage = slippage or self.default_slippage
+            # The raw quote JSON is dropped once parsed; only lean routes are cached
+            routes = await self._cached_get(
+                self._quote_key(input_token, output_token, amount, slippage, exact),
                 'quote',
-                params={
-                    'inputMint': input_token,
-                    'outputMint': output_token,
-                    'amount': str(amount),
-                    'slippage': slippage or self.default_slippage,
-                    'feeBps': 4
-                }
+                params=self._quote_params(input_token, output_token, amount, slippage),
+                parse=_parse_routes
             )
-            
-            routes = []
-            for route_data in response['routes']:
-                route = Route(
-                    in_amount=Decimal(route_data['inAmount']),
-                    out_amount=Decimal(route_data['outAmount']),
-                    price_impact=float(route_data['priceImpact']),
-                    market_infos=route_data['marketInfos'],
-                    slippage=float(route_data['slippage']),
-                    fees=route_data['fees']
-                )
-                routes.append(route)
-                
-            return routes
+            return list(routes)
             
         except Exception as e:
             logger.error(f"Error getting swap routes: {str(e)}")
             raise JupiterSwapError(f"Failed to get swap routes: {str(e)}")
 
+    async def get_swap_routes_many(
+        self,
+        pairs: List[Tuple[str, str, Decimal]],
+        slippage: Optional[float] = None,
+        max_concurrency: int = 16
+    ) -> List[List[Route]]:
+        """Fetch routes for many (input, output, amount) pairs concurrently."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(input_token: str, output_token: str, amount: Decimal) -> List[Route]:
+            async with semaphore:
+                return await self.get_swap_routes(input_token, output_token, amount, slippage)
+        
+        return await asyncio.gather(*(fetch(*pair) for pair in pairs))
+
     async def execute_swap(
         self,
         input_token: str,
@@ -233,12 +675,20 @@ class SwapManager:
     ) -> SwapResult:
         """Execute a token swap."""
         try:
+            # Resolve token metadata first so an unknown mint fails before any swap
+            input_meta, output_meta = await asyncio.gather(
+                self._get_token(input_token),
+                self._get_token(output_token)
+            )
+            
             # Get best route
+            # Executions never reuse a quote for a different amount
             routes = await self.get_swap_routes(
                 input_token,
                 output_token,
                 amount,
-                slippage
+                slippage,
+                exact=True
             )
             
             if not routes:
@@ -254,11 +704,16 @@ class SwapManager:
             }
             
             # Get transaction data
-            tx_response = await self._make_request(
-                'POST',
-                'swap',
-                data=swap_data
-            )
+            try:
+                tx_response = await self._make_request(
+                    'POST',
+                    'swap',
+                    data=swap_data
+                )
+            except JupiterSwapError:
+                # A rejected swap usually means the cached route went stale
+                self.invalidate_quote(input_token, output_token, amount, slippage)
+                raise
             
             # Execute transaction
             transaction_id = tx_response['txid']
@@ -266,13 +721,21 @@ class SwapManager:
             # Create swap result
             result = SwapResult(
                 transaction_id=transaction_id,
-                input_token=self.token_cache[input_token],
-                output_token=self.token_cache[output_token],
-                input_amount=amount,
-                output_amount=best_route.out_amount,
+                input_token=input_meta,
+                output_token=output_meta,
+                input_amount_raw=int(amount),
+                output_amount_raw=best_route.out_amount_raw,
                 price_impact=best_route.price_impact,
                 route=best_route,
-                timestamp=datetime.now()
+                timestamp_ns=time.time_ns()
+            )
+            # Executed swaps keep displayed prices current without extra calls
+            self._record_rate(
+                input_token,
+                output_token,
+                Decimal(result.input_amount_raw),
+                Decimal(result.output_amount_raw),
+                result.price_impact
             )
             
             return result
@@ -293,6 +756,23 @@ class SwapManager:
         except Exception as e:
             logger.error(f"Error getting swap status: {str(e)}")
             raise JupiterSwapError(f"Failed to get swap status: {str(e)}")
+
+    async def get_signature_status(self, signature: str) -> dict:
+        """Get the cluster's status for a sent transaction signature."""
+        # Takes the signature returned once a signed swap is sent, not the
+        # unsigned transaction SwapResult.transaction_id carries
+        try:
+            result = await self._rpc_call(
+                'getSignatureStatuses',
+                [[signature], {'searchTransactionHistory': True}]
+            )
+            # None for signatures the cluster has not seen
+            return result['value'][0] or {}
+            
+        except Exception as e:
+            logger.error(f"Error getting signature status: {str(e)}")
+            raise JupiterSwapError(f"Failed to get signature status: {str(e)}")
+
     async def execute_swap_with_config(
         self,
         input_token: str,
@@ -304,18 +784,25 @@ class SwapManager:
     ) -> SwapResult:
         """Execute a token swap with advanced configuration."""
         try:
-            # Get best route
-            routes = await self.get_swap_routes(
+            # Resolve token metadata first so an unknown mint fails before any swap
+            input_meta, output_meta = await asyncio.gather(
+                self._get_token(input_token),
+                self._get_token(output_token)
+            )
+            
+            # The swap endpoint takes the quote body verbatim, so fetch it fresh and unparsed
+            quote = await self._get_quote_raw(
                 input_token,
                 output_token,
                 amount,
-                slippage
+                slippage or self.default_slippage
             )
             
-            if not routes:
+            if not quote.get('routes'):
                 raise JupiterSwapError("No valid routes found")
             
-            best_route = routes[0]
+            # Only the best route is parsed, for the result
+            best_route = _parse_route(quote['routes'][0])
             
             # Prepare transaction with advanced configuration
             swap_data = {
@@ -342,20 +829,12 @@ class SwapManager:
                 swap_data['destinationTokenAccount'] = config.destination_token_account
             
             if config.prioritization_fee:
-                if config.prioritization_fee.type == 'auto':
-                    swap_data['prioritizationFeeLamports'] = 'auto'
-                elif config.prioritization_fee.type == 'autoMultiplier':
-                    swap_data['prioritizationFeeLamports'] = {
-                        'autoMultiplier': config.prioritization_fee.value
-                    }
-                elif config.prioritization_fee.type == 'jitoTipLamports':
-                    swap_data['prioritizationFeeLamports'] = {
-                        'jitoTipLamports': config.prioritization_fee.value
-                    }
-                elif config.prioritization_fee.type == 'priorityLevelWithMaxLamports':
-                    swap_data['prioritizationFeeLamports'] = {
-                        'priorityLevelWithMaxLamports': config.prioritization_fee.value
-                    }
+                # Unknown fee types are left out, as before
+                build_fee = _PRIORITY_FEE_BUILDERS.get(config.prioritization_fee.type)
+                if build_fee:
+                    swap_data['prioritizationFeeLamports'] = build_fee(
+                        config.prioritization_fee.value
+                    )
 
             if config.dynamic_slippage:
                 swap_data['dynamicSlippage'] = {
@@ -363,36 +842,38 @@ class SwapManager:
                     'maxBps': config.dynamic_slippage.max_bps
                 }
 
-            # Add quote response
-            swap_data['quoteResponse'] = {
-                'inputMint': input_token,
-                'inAmount': str(amount),
-                'outputMint': output_token,
-                'outAmount': str(best_route.out_amount),
-                'otherAmountThreshold': str(best_route.out_amount),
-                'swapMode': 'ExactIn',
-                'slippageBps': int(slippage * 100) if slippage else int(self.default_slippage * 100),
-                'priceImpactPct': str(best_route.price_impact),
-                'routePlan': best_route.market_infos
-            }
+            swap_data['quoteResponse'] = quote
             
             # Execute the swap
-            tx_response = await self._make_request(
-                'POST',
-                'swap',
-                data=swap_data
-            )
+            try:
+                tx_response = await self._make_request(
+                    'POST',
+                    'swap',
+                    data=swap_data
+                )
+            except JupiterSwapError:
+                # The quote was stale, so cached ones for this pair likely are too
+                self.invalidate_quote(input_token, output_token, amount, slippage)
+                raise
             
             # Create swap result with additional information
             result = SwapResult(
                 transaction_id=tx_response['swapTransaction'],
-                input_token=self.token_cache[input_token],
-                output_token=self.token_cache[output_token],
-                input_amount=amount,
-                output_amount=best_route.out_amount,
+                input_token=input_meta,
+                output_token=output_meta,
+                input_amount_raw=int(amount),
+                output_amount_raw=best_route.out_amount_raw,
                 price_impact=best_route.price_impact,
                 route=best_route,
-                timestamp=datetime.now()
+                timestamp_ns=time.time_ns()
+            )
+            # Executed swaps keep displayed prices current without extra calls
+            self._record_rate(
+                input_token,
+                output_token,
+                Decimal(result.input_amount_raw),
+                Decimal(result.output_amount_raw),
+                result.price_impact
             )
             
             return result
@@ -400,12 +881,13 @@ class SwapManager:
         except Exception as e:
             logger.error(f"Error executing swap: {str(e)}")
             raise JupiterSwapError(f"Failed to execute swap: {str(e)}")
+
 # Example usage
 if __name__ == "__main__":
     async def main():
         swap_manager = SwapManager(
             api_key="your-api-key",
-            rpc_url="https://api.mainnet-beta.solana.com"
+            rpc_urls=["https://api.mainnet-beta.solana.com"]
         )
         
         try:
@@ -3,7 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 from typing import Optional, Literal
 import logging
-from datetime import datetime
+import asyncio
+import math
 
 from ai.groq_client import GroqClient
 from github import Github as GitHubClient
@@ -11,6 +12,7 @@ from blockchain.crossmint.wallet import WalletManager
 from blockchain.jupiter.swaps import SwapManager
 from dao.governance import GovernanceManager
 from dao.token import TokenManager
+from resilience import TokenBucketLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -47,15 +49,25 @@ class BotCommands(commands.Cog):
         self.governance_manager = governance_manager
         self.token_manager = token_manager
         self.permissions = CommandPermissions()
-        self.last_analysis = {}  # Rate limiting tracker
+        # One analysis per user every 30 seconds
+        self.analysis_limiter = TokenBucketLimiter(rate=1 / 30, capacity=1)
+        self._purge_task: Optional[asyncio.Task] = None
 
     async def can_analyze(self, user_id: int) -> bool:
-        """Check rate limiting for analysis commands"""
-        if user_id not in self.last_analysis:
-            return True
-        
-        time_diff = datetime.now() - self.last_analysis[user_id]
-        return time_diff.seconds >= 30  # 30 second cooldown
+        """Check rate limiting for analysis commands, consuming the user's token"""
+        return self.analysis_limiter.try_acquire(user_id)
+
+    def cooldown_remaining(self, user_id: int) -> int:
+        """Whole seconds until the user may run another analysis"""
+        return math.ceil(self.analysis_limiter.retry_after(user_id))
+
+    async def _purge_rate_limits(self, interval: float = 300):
+        """Periodically drop rate limit state for dormant users"""
+        while True:
+            await asyncio.sleep(interval)
+            purged = self.analysis_limiter.purge_idle()
+            if purged:
+                logger.debug(f"Purged rate limit state for {purged} idle users")
 
     @app_commands.command(name="analyze-pr")
     @app_commands.describe(url="GitHub pull request URL to analyze")
@@ -63,7 +75,7 @@ class BotCommands(commands.Cog):
         """Analyze a GitHub pull request"""
         if not await self.can_analyze(interaction.user.id):
             await interaction.response.send_message(
-                "Please wait before requesting another analysis.",
+                f"Please wait {self.cooldown_remaining(interaction.user.id)}s before requesting another analysis.",
                 ephemeral=True
             )
             return
@@ -87,7 +99,6 @@ class BotCommands(commands.Cog):
             embed.add_field(name="Changes", value=analysis['changes'], inline=False)
             embed.add_field(name="Recommendations", value=analysis['recommendations'], inline=False)
             
-            self.last_analysis[interaction.user.id] = datetime.now()
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -103,7 +114,7 @@ class BotCommands(commands.Cog):
         """Review a code snippet"""
         if not await self.can_analyze(interaction.user.id):
             await interaction.response.send_message(
-                "Please wait before requesting another review.",
+                f"Please wait {self.cooldown_remaining(interaction.user.id)}s before requesting another review.",
                 ephemeral=True
             )
             return
@@ -121,7 +132,6 @@ class BotCommands(commands.Cog):
             embed.add_field(name="Best Practices", value=review['best_practices'], inline=False)
             embed.add_field(name="Suggestions", value=review['suggestions'], inline=False)
             
-            self.last_analysis[interaction.user.id] = datetime.now()
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -227,8 +237,19 @@ class BotCommands(commands.Cog):
 
         try:
             if action == "balance":
-                balance = await self.token_manager.get_balance(interaction.user.id)
-                staked = await self.token_manager.get_staked_amount(interaction.user.id)
+                # Independent lookups, so run them concurrently
+                try:
+                    async with asyncio.TaskGroup() as tg:
+                        balance_task = tg.create_task(
+                            self.token_manager.get_balance(interaction.user.id)
+                        )
+                        staked_task = tg.create_task(
+                            self.token_manager.get_staked_amount(interaction.user.id)
+                        )
+                except ExceptionGroup as eg:
+                    # Report the underlying error, not the group
+                    raise eg.exceptions[0]
+                balance, staked = balance_task.result(), staked_task.result()
                 
                 embed = discord.Embed(
                     title="Token Balance",
@@ -281,10 +302,14 @@ class BotCommands(commands.Cog):
 
     async def cog_load(self):
         """Called when the cog is loaded"""
+        self._purge_task = asyncio.create_task(self._purge_rate_limits())
         logger.info("Commands cog loaded")
 
     async def cog_unload(self):
         """Called when the cog is unloaded"""
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            self._purge_task = None
         logger.info("Commands cog unloaded")
 
 def setup(bot: commands.Bot):
@@ -3,42 +3,88 @@ from discord.ext import commands
 import logging
 from typing import Optional, Dict, Any
 import asyncio
-from datetime import datetime
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import orjson
 
 from ai.groq_client import GroqClient
 from github import GitHubClient
 from blockchain.crossmint.wallet import WalletManager
 from blockchain.jupiter.swaps import SwapManager
+from bot.events import EventHandler
+from resilience import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Digest of the last slash command tree synced to Discord
+SLASH_TREE_HASH_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "solanaprbot", "slash_tree.sha256"
+)
+
 class BotState:
     """Manages the bot's state and active sessions."""
+    MAX_SESSIONS = 10_000
+    MAX_ACTIVE_ANALYSES = 1_000
+    ANALYSIS_COOLDOWN = 60.0  # Seconds between analyses per channel
+
+    # Defaults for new entries, shallow-copied per user or guild
+    _SESSION_TEMPLATE = {
+        'last_command': None,
+        'command_count': 0,
+        'premium_status': False
+    }
+    _GUILD_SETTINGS_TEMPLATE = {
+        'welcome_channel': None,
+        'admin_role': None
+    }
+
     def __init__(self):
-        self.active_analyses: Dict[int, datetime] = {}  # channel_id -> last_analysis_time
-        self.user_sessions: Dict[int, Dict[str, Any]] = {}  # user_id -> session_data
+        # Both ordered oldest first, so the front is what gets evicted
+        self.active_analyses: OrderedDict = OrderedDict()  # channel_id -> last analysis, time.monotonic()
+        self.user_sessions: OrderedDict = OrderedDict()  # user_id -> session_data, LRU
         self.guild_settings: Dict[int, Dict[str, Any]] = {}  # guild_id -> settings
         
     def get_user_session(self, user_id: int) -> Dict[str, Any]:
         """Get or create a user session."""
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {
-                'last_command': None,
-                'command_count': 0,
-                'premium_status': False
-            }
-        return self.user_sessions[user_id]
+        if user_id in self.user_sessions:
+            self.user_sessions.move_to_end(user_id)
+            return self.user_sessions[user_id]
+        
+        session = self.user_sessions[user_id] = self._SESSION_TEMPLATE.copy()
+        while len(self.user_sessions) > self.MAX_SESSIONS:
+            self.user_sessions.popitem(last=False)
+        return session
+
+    def get_guild_settings(self, guild_id: int) -> Dict[str, Any]:
+        """Get or create a guild's settings."""
+        settings = self.guild_settings.get(guild_id)
+        if settings is None:
+            settings = self.guild_settings[guild_id] = self._GUILD_SETTINGS_TEMPLATE.copy()
+        return settings
 
     def update_analysis_time(self, channel_id: int):
         """Update the last analysis time for a channel."""
-        self.active_analyses[channel_id] = datetime.now()
+        now = time.monotonic()
+        self.active_analyses[channel_id] = now
+        self.active_analyses.move_to_end(channel_id)
+        
+        # Entries past the cooldown no longer limit anything; expire them from the front
+        while self.active_analyses:
+            oldest_id, oldest_at = next(iter(self.active_analyses.items()))
+            if (
+                now - oldest_at < self.ANALYSIS_COOLDOWN
+                and len(self.active_analyses) <= self.MAX_ACTIVE_ANALYSES
+            ):
+                break
+            del self.active_analyses[oldest_id]
 
     def can_analyze(self, channel_id: int) -> bool:
         """Check if enough time has passed for a new analysis."""
-        if channel_id not in self.active_analyses:
-            return True
-        time_diff = datetime.now() - self.active_analyses[channel_id]
-        return time_diff.seconds >= 60  # Rate limit: 1 minute
+        # Channels never seen are always allowed
+        return time.monotonic() - self.active_analyses.get(channel_id, -1e9) >= self.ANALYSIS_COOLDOWN
 
 class DiscordClient(commands.Bot):
     def __init__(
@@ -54,7 +100,14 @@ class DiscordClient(commands.Bot):
         intents.message_content = True
         intents.members = True
         
-        super().__init__(command_prefix=command_prefix, intents=intents)
+        super().__init__(
+            command_prefix=command_prefix,
+            intents=intents,
+            # Member events carry their member in the payload and member_count comes
+            # with the guild, so skip downloading and caching every guild's members
+            chunk_guilds_at_startup=False,
+            member_cache_flags=discord.MemberCacheFlags.none()
+        )
         
         self.token = token
         self.ai_client = ai_client
@@ -62,10 +115,26 @@ class DiscordClient(commands.Bot):
         self.wallet_manager = wallet_manager
         self.swap_manager = swap_manager
         self.state = BotState()
+        # In-flight wallet lookups by user id, shared by concurrent !wallet calls
+        self._wallet_inflight = SingleFlight()
         
-        # Register commands and events
+        # Register commands; gateway events are handled by the one EventHandler
         self.setup_commands()
-        self.setup_events()
+        self.events = EventHandler(
+            bot=self,
+            ai_client=ai_client,
+            github_client=github_client,
+            wallet_manager=wallet_manager,
+            swap_manager=swap_manager
+        )
+
+    async def _get_or_create_wallet(self, user_id: int):
+        """Fetch a user's wallet, sharing one call between concurrent requests."""
+        # A repeated !wallet must not race a second wallet creation for the same user
+        return await self._wallet_inflight.do(
+            user_id,
+            lambda: self.wallet_manager.get_or_create_wallet(user_id)
+        )
 
     def setup_commands(self):
         """Register bot commands."""
@@ -78,11 +147,12 @@ class DiscordClient(commands.Bot):
                 return
             
             try:
+                # GroqClient caches and coalesces repeated snippets, honouring its TTL
                 analysis = await self.ai_client.analyze_code(code)
                 self.state.update_analysis_time(ctx.channel.id)
                 await ctx.send(f"Analysis results:\n```{analysis}```")
-            except Exception as e:
-                logger.error(f"Error analyzing code: {e}")
+            except Exception:
+                logger.exception("Error analyzing code")
                 await ctx.send("Sorry, I encountered an error while analyzing the code.")
 
         @self.command(name='pr')
@@ -92,8 +162,8 @@ class DiscordClient(commands.Bot):
                 pr_data = await self.github_client.get_pr(pr_url)
                 analysis = await self.ai_client.analyze_pr(pr_data)
                 await ctx.send(f"Pull request analysis:\n```{analysis}```")
-            except Exception as e:
-                logger.error(f"Error analyzing PR: {e}")
+            except Exception:
+                logger.exception("Error analyzing PR")
                 await ctx.send("Sorry, I couldn't analyze that pull request.")
 
         @self.command(name='wallet')
@@ -101,67 +171,67 @@ class DiscordClient(commands.Bot):
             """Get wallet information."""
             try:
                 user_session = self.state.get_user_session(ctx.author.id)
-                wallet = await self.wallet_manager.get_or_create_wallet(ctx.author.id)
+                wallet = await self._get_or_create_wallet(ctx.author.id)
                 await ctx.send(f"Wallet address: `{wallet.address}`\nBalance: {wallet.balance}")
-            except Exception as e:
-                logger.error(f"Error getting wallet info: {e}")
+            except Exception:
+                logger.exception("Error getting wallet info")
                 await ctx.send("Sorry, I couldn't retrieve your wallet information.")
 
-    def setup_events(self):
-        """Set up event handlers."""
-
-        @self.event
-        async def on_ready():
-            """Called when the bot is ready."""
-            logger.info(f'Bot is ready. Logged in as {self.user.name} ({self.user.id})')
-            await self.change_presence(activity=discord.Game(name="Analyzing Code"))
-
-        @self.event
-        async def on_guild_join(guild):
-            """Called when the bot joins a new server."""
-            logger.info(f'Joined new guild: {guild.name} ({guild.id})')
-            self.state.guild_settings[guild.id] = {
-                'welcome_channel': None,
-                'admin_role': None
-            }
-
-        @self.event
-        async def on_command_completion(ctx):
-            """Called when a command completes successfully."""
-            user_session = self.state.get_user_session(ctx.author.id)
-            user_session['last_command'] = ctx.command.name
-            user_session['command_count'] += 1
-
-        @self.event
-        async def on_message(message):
-            """Called for every message."""
-            if message.author.bot:
-                return
-            
-            # Process commands
-            await self.process_commands(message)
-            
-            # Additional message handling
-            if self.user.mentioned_in(message):
-                await message.channel.send(
-                    "Hi! Use !help to see available commands."
-                )
+    async def setup_hook(self):
+        """Sync slash commands with Discord when their definitions changed."""
+        await self._sync_command_tree()
+
+    async def _sync_command_tree(self):
+        """Push the command tree unless an identical one was already synced."""
+        # The application id is included so a token for another bot always syncs
+        payload = orjson.dumps(
+            [self.application_id, [command.to_dict() for command in self.tree.get_commands()]],
+            option=orjson.OPT_SORT_KEYS
+        )
+        digest = hashlib.sha256(payload).hexdigest()
+        
+        force = os.getenv("DISCORD_FORCE_SYNC", "").lower() in ("1", "true", "yes")
+        if not force:
+            try:
+                with open(SLASH_TREE_HASH_PATH) as f:
+                    if f.read().strip() == digest:
+                        logger.info("Slash commands unchanged, skipping sync")
+                        return
+            except OSError:
+                pass
+        
+        synced = await self.tree.sync()
+        logger.info("Synced %s slash commands", len(synced))
+        try:
+            os.makedirs(os.path.dirname(SLASH_TREE_HASH_PATH), exist_ok=True)
+            with open(SLASH_TREE_HASH_PATH, "w") as f:
+                f.write(digest)
+        except OSError as e:
+            # Only costs a redundant sync on the next start
+            logger.warning("Could not record slash command digest: %s", e)
+
+    async def on_command_completion(self, ctx):
+        """Called when a command completes successfully."""
+        user_session = self.state.get_user_session(ctx.author.id)
+        user_session['last_command'] = ctx.command.name
+        user_session['command_count'] += 1
 
     async def start_bot(self):
         """Start the bot with error handling."""
         try:
             await self.start(self.token)
-        except Exception as e:
-            logger.error(f"Failed to start bot: {e}")
+        except Exception:
+            logger.exception("Failed to start bot")
             raise
 
     async def cleanup(self):
         """Cleanup bot resources."""
         try:
             await self.close()
+            await self.events.close()
             logger.info("Bot shutdown complete")
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
+        except Exception:
+            logger.exception("Error during cleanup")
             raise
 
 # Example usage
@@ -183,4 +253,11 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             await bot.cleanup()
 
-    asyncio.run(run_bot())
\ No newline at end of file
+    # Same libuv-backed loop as main.py, where available
+    try:
+        import uvloop
+    except ImportError:  # uvloop has no Windows build
+        uvloop = None
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(run_bot())
\ No newline at end of file
@@ -1,17 +1,52 @@
 import discord
 from discord.ext import commands
 import logging
-from typing import Optional
-from datetime import datetime
+from typing import Dict, Optional
+from collections import defaultdict
+from dataclasses import dataclass, field
+import asyncio
+import re
+import time
 
 from ai.groq_client import GroqClient
 from github import GitHubClient
 from blockchain.crossmint.wallet import WalletManager
 from blockchain.jupiter.swaps import SwapManager
+from resilience import BoundedTaskRunner
 
 logger = logging.getLogger(__name__)
 
+# Marker on messages announcing a governance proposal; captures the proposal id
+PROPOSAL_RE = re.compile(r"Proposal #(\d+)")
+
+@dataclass(slots=True)
+class GuildStats:
+    """Per-guild activity counters."""
+    joined_at: float  # time.time()
+    member_count: int
+    message_count: int = 0
+    command_usage: Dict[str, int] = field(default_factory=dict)
+    last_activity: float = field(default_factory=time.monotonic)
+
 class EventHandler:
+    # Registered with @bot.event, which replaces rather than adds to a handler
+    _EVENTS = frozenset({
+        "on_ready",
+        "on_error",
+        "on_guild_join",
+        "on_message",
+        "on_command_error",
+        "on_member_join",
+        "on_reaction_add",
+        "on_guild_channel_create",
+        "on_guild_channel_delete",
+        "on_guild_channel_update"
+    })
+
+    # Welcome channel names, most preferred first
+    WELCOME_PRIORITY: tuple[str, ...] = ("welcome", "general", "lobby")
+    _WELCOME_SET = frozenset(WELCOME_PRIORITY)
+
     def __init__(
         self,
         bot: commands.Bot,
@@ -26,8 +61,32 @@ class EventHandler:
         self.wallet_manager = wallet_manager
         self.swap_manager = swap_manager
         
+        # Extra listeners for the same events would dispatch every message twice
+        duplicates = self._EVENTS.intersection(bot.extra_events)
+        if duplicates:
+            raise RuntimeError(f"Listeners already registered for {sorted(duplicates)}")
+        
         # Track guild statistics
-        self.guild_stats = {}
+        self.guild_stats: Dict[int, GuildStats] = {}
+        # Messages counted since the last flush, folded into guild_stats periodically
+        self._pending_messages: Dict[int, int] = defaultdict(int)
+        self.stats_flush_interval = 5.0
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Resolved welcome channel id per guild, dropped when the guild's channels change
+        self._welcome_cache: Dict[int, Optional[int]] = {}
+        
+        # Commands run off the event handler, at most 32 at once and 512 queued
+        self.command_runner = BoundedTaskRunner("commands", max_concurrency=32, max_pending=512)
+        
+        # Fixed prefixes let plain chatter skip command parsing; callables can't be known ahead
+        prefix = bot.command_prefix
+        if isinstance(prefix, str):
+            self._prefixes: Optional[tuple] = (prefix,)
+        elif isinstance(prefix, (list, tuple)):
+            self._prefixes = tuple(prefix)
+        else:
+            self._prefixes = None
         
         # Set up event handlers
         self.setup_events()
@@ -38,65 +97,74 @@ class EventHandler:
         @self.bot.event
         async def on_ready():
             """Handle bot ready event."""
-            try:
-                logger.info(f"Bot is ready. Logged in as {self.bot.user.name} ({self.bot.user.id})")
-                
-                # Update presence
-                await self.bot.change_presence(
-                    activity=discord.Activity(
-                        type=discord.ActivityType.watching,
-                        name="GitHub PRs"
-                    )
+            logger.info("Bot is ready. Logged in as %s (%s)", self.bot.user.name, self.bot.user.id)
+            
+            # Update presence
+            await self.bot.change_presence(
+                activity=discord.Activity(
+                    type=discord.ActivityType.watching,
+                    name="GitHub PRs"
                 )
-                
-                # Initialize guild statistics
-                for guild in self.bot.guilds:
-                    await self._initialize_guild_stats(guild)
-                    
-            except Exception as e:
-                logger.error(f"Error in on_ready: {str(e)}")
+            )
+            
+            # Guild statistics are created lazily by _stats, so readiness isn't delayed.
+            # on_ready fires again after reconnects; keep a single flusher
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_stats_periodically())
+
+        @self.bot.event
+        async def on_error(event_method: str, *args, **kwargs):
+            """Log any exception raised by an event handler, with its traceback."""
+            logger.exception("Unhandled error in %s", event_method)
 
         @self.bot.event
         async def on_guild_join(guild: discord.Guild):
             """Handle bot joining a new server."""
-            try:
-                logger.info(f"Joined new guild: {guild.name} (ID: {guild.id})")
-                
-                # Initialize guild statistics
-                await self._initialize_guild_stats(guild)
-                
-                # Send welcome message
-                welcome_channel = self._get_welcome_channel(guild)
-                if welcome_channel:
-                    await welcome_channel.send(
-                        "👋 Hello! I'm GitHub DAO Bot. I help manage GitHub repositories "
-                        "and handle DAO governance. Use `/help` to see available commands!"
-                    )
-                    
-            except Exception as e:
-                logger.error(f"Error in on_guild_join: {str(e)}")
+            logger.info("Joined new guild: %s (ID: %s)", guild.name, guild.id)
+            
+            # Initialize guild statistics
+            self._stats(guild.id)
+            if hasattr(self.bot, "state"):
+                self.bot.state.get_guild_settings(guild.id)
+            
+            # Send welcome message
+            welcome_channel = self._get_welcome_channel(guild)
+            if welcome_channel:
+                await welcome_channel.send(
+                    "👋 Hello! I'm GitHub DAO Bot. I help manage GitHub repositories "
+                    "and handle DAO governance. Use `/help` to see available commands!"
+                )
+
+        # Resolved once so the per-message handlers only touch closure locals;
+        # bot.user is read per call since it is unset until the bot is ready
+        bot = self.bot
+        prefixes = self._prefixes
+        submit = self.command_runner.submit
+        process_commands = bot.process_commands
+        handle_mention = self._handle_mention
+        record_message = self.record_message
+        handle_governance_reaction = self._handle_governance_reaction
 
         @self.bot.event
         async def on_message(message: discord.Message):
             """Handle incoming messages."""
-            try:
-                # Ignore bot messages
-                if message.author.bot:
-                    return
+            # Ignore bot messages
+            if message.author.bot:
+                return
 
-                # Process commands first
-                await self.bot.process_commands(message)
+            mentioned = bot.user in message.mentions
+            
+            # Process commands first, without holding up the rest of the handler
+            if mentioned or prefixes is None or message.content.startswith(prefixes):
+                submit(process_commands(message))
+            
+            # Handle bot mentions
+            if mentioned:
+                await handle_mention(message)
                 
-                # Handle bot mentions
-                if self.bot.user in message.mentions:
-                    await self._handle_mention(message)
-                    
-                # Update statistics
-                if message.guild:
-                    self._update_guild_stats(message.guild.id, "messages")
-                    
-            except Exception as e:
-                logger.error(f"Error in on_message: {str(e)}")
+            # Update statistics
+            if message.guild:
+                record_message(message.guild.id)
 
         @self.bot.event
         async def on_command_error(ctx: commands.Context, error: Exception):
@@ -118,68 +186,108 @@ class EventHandler:
                     )
                     
                 else:
-                    logger.error(f"Command error in {ctx.command}: {str(error)}")
+                    logger.error("Command error in %s: %s", ctx.command, error)
                     await ctx.send(
                         "An error occurred while processing your command. "
                         "Please try again later."
                     )
                     
-            except Exception as e:
-                logger.error(f"Error in on_command_error: {str(e)}")
+            except Exception:
+                logger.exception("Error in on_command_error")
 
         @self.bot.event
         async def on_member_join(member: discord.Member):
             """Handle new member joins."""
-            try:
-                logger.info(f"New member joined: {member.name} (Guild: {member.guild.name})")
-                
-                # Update statistics
-                self._update_guild_stats(member.guild.id, "members")
-                
-                # Send welcome message
-                welcome_channel = self._get_welcome_channel(member.guild)
-                if welcome_channel:
-                    await welcome_channel.send(
-                        f"Welcome {member.mention} to {member.guild.name}! "
-                        f"Use `/help` to see what I can do."
-                    )
-                    
-            except Exception as e:
-                logger.error(f"Error in on_member_join: {str(e)}")
+            logger.info("New member joined: %s (Guild: %s)", member.name, member.guild.name)
+            
+            # Update statistics
+            self.record_member(member.guild.id)
+            
+            # Send welcome message
+            welcome_channel = self._get_welcome_channel(member.guild)
+            if welcome_channel:
+                await welcome_channel.send(
+                    f"Welcome {member.mention} to {member.guild.name}! "
+                    f"Use `/help` to see what I can do."
+                )
 
         @self.bot.event
         async def on_reaction_add(reaction: discord.Reaction, user: discord.User):
             """Handle reaction additions."""
-            try:
-                if user.bot:
-                    return
-                    
-                # Handle governance vote reactions
-                if reaction.message.channel.name == "governance":
-                    await self._handle_governance_reaction(reaction, user)
-                    
-            except Exception as e:
-                logger.error(f"Error in on_reaction_add: {str(e)}")
-
-    async def _initialize_guild_stats(self, guild: discord.Guild):
-        """Initialize statistics for a guild."""
-        self.guild_stats[guild.id] = {
-            "joined_at": datetime.now(),
-            "member_count": guild.member_count,
-            "message_count": 0,
-            "command_usage": {},
-            "last_activity": datetime.now()
-        }
-
-    def _update_guild_stats(self, guild_id: int, stat_type: str):
-        """Update guild statistics."""
-        if guild_id in self.guild_stats:
-            if stat_type == "messages":
-                self.guild_stats[guild_id]["message_count"] += 1
-            elif stat_type == "members":
-                self.guild_stats[guild_id]["member_count"] += 1
-            
-            self.guild_stats[guild_id]["last_activity"] = datetime.now()
+            if user.bot:
+                return
+                
+            # Handle governance vote reactions
+            if reaction.message.channel.name == "governance":
+                await handle_governance_reaction(reaction, user)
+
+        @self.bot.event
+        async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+            """Forget the guild's welcome channel when channels change."""
+            self._invalidate_welcome_channel(channel)
+
+        @self.bot.event
+        async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+            """Forget the guild's welcome channel when channels change."""
+            self._invalidate_welcome_channel(channel)
+
+        @self.bot.event
+        async def on_guild_channel_update(
+            before: discord.abc.GuildChannel,
+            after: discord.abc.GuildChannel
+        ):
+            """Forget the guild's welcome channel when channels change."""
+            self._invalidate_welcome_channel(before, after)
+
+    def _stats(self, guild_id: int) -> GuildStats:
+        """Get a guild's statistics, creating them on first use."""
+        stats = self.guild_stats.get(guild_id)
+        if stats is None:
+            guild = self.bot.get_guild(guild_id)
+            stats = self.guild_stats[guild_id] = GuildStats(
+                joined_at=time.time(),
+                member_count=guild.member_count if guild else 0
+            )
+        return stats
+
+    def record_message(self, guild_id: int):
+        """Count a message; totals reach guild_stats on the next flush."""
+        self._pending_messages[guild_id] += 1
+
+    def flush_stats(self):
+        """Fold pending message counts into the guild statistics."""
+        if not self._pending_messages:
+            return
+        now = time.monotonic()
+        for guild_id, count in self._pending_messages.items():
+            stats = self._stats(guild_id)
+            stats.message_count += count
+            stats.last_activity = now
+        self._pending_messages.clear()
+
+    async def _flush_stats_periodically(self):
+        """Flush pending message counts every stats_flush_interval seconds."""
+        while True:
+            await asyncio.sleep(self.stats_flush_interval)
+            self.flush_stats()
+
+    async def close(self):
+        """Stop background work and flush outstanding statistics."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.command_runner.aclose()
+        self.flush_stats()
+
+    def record_member(self, guild_id: int):
+        """Count a new member in a guild."""
+        stats = self.guild_stats.get(guild_id)
+        if stats is None:
+            # Created now, so the guild's member count already includes them
+            self._stats(guild_id)
+            return
+        stats.member_count += 1
+        stats.last_activity = time.monotonic()
 
     async def _handle_mention(self, message: discord.Message):
         """Handle when the bot is mentioned."""
@@ -192,8 +300,8 @@ class EventHandler:
                 f"Use `/help` to see what I can do!"
             )
             
-        except Exception as e:
-            logger.error(f"Error handling mention: {str(e)}")
+        except Exception:
+            logger.exception("Error handling mention")
             await message.reply(
                 "Sorry, I couldn't process that mention. Please try using a command instead!"
             )
@@ -206,33 +314,58 @@ class EventHandler:
         """Handle reactions in governance channel."""
         try:
             # Check if reaction is on a proposal message
-            if "Proposal #" in reaction.message.content:
-                # Record vote
-                vote_type = str(reaction.emoji)
+            match = PROPOSAL_RE.search(reaction.message.content)
+            if match:
+                # Unicode emoji already arrive as str; only custom emoji need converting
+                emoji = reaction.emoji
+                vote_type = emoji if isinstance(emoji, str) else str(emoji)
                 await self._record_vote(
                     user.id,
-                    reaction.message.id,
+                    int(match.group(1)),
                     vote_type
                 )
                 
-        except Exception as e:
-            logger.error(f"Error handling governance reaction: {str(e)}")
+        except Exception:
+            logger.exception("Error handling governance reaction")
 
     def _get_welcome_channel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
         """Get appropriate welcome channel for a guild."""
-        # Try to find a welcome channel
-        welcome_channels = ["welcome", "general", "lobby"]
+        if guild.id in self._welcome_cache:
+            channel_id = self._welcome_cache[guild.id]
+            return guild.get_channel(channel_id) if channel_id is not None else None
         
-        for channel_name in welcome_channels:
-            channel = discord.utils.get(
-                guild.text_channels,
-                name=channel_name
-            )
-            if channel:
-                return channel
+        # guild.text_channels sorts on every access, so read it once; then one pass
+        # indexes only the candidate names, the first of each name winning as before
+        text_channels = guild.text_channels
+        welcome_names = self._WELCOME_SET
+        by_name: Dict[str, discord.TextChannel] = {}
+        for channel in text_channels:
+            if channel.name in welcome_names:
+                by_name.setdefault(channel.name, channel)
         
-        # Fall back to first text channel
-        return guild.text_channels[0] if guild.text_channels else None
+        # Try to find a welcome channel
+        channel = next(
+            (by_name[name] for name in self.WELCOME_PRIORITY if name in by_name),
+            # Fall back to first text channel
+            text_channels[0] if text_channels else None
+        )
+        self._welcome_cache[guild.id] = channel.id if channel else None
+        return channel
+
+    def _invalidate_welcome_channel(self, *channels: discord.abc.GuildChannel):
+        """Drop a guild's cached welcome channel if the changed channels could affect it."""
+        guild = channels[-1].guild
+        if guild.id not in self._welcome_cache:
+            return
+        cached_id = self._welcome_cache[guild.id]
+        cached = guild.get_channel(cached_id) if cached_id is not None else None
+        # A fallback pick depends on channel order, so any change can move it
+        if (
+            cached is None
+            or cached.name not in self._WELCOME_SET
+            or any(c.id == cached_id or c.name in self._WELCOME_SET for c in channels)
+        ):
+            del self._welcome_cache[guild.id]
 
     async def _record_vote(self, user_id: int, proposal_id: int, vote_type: str):
         """Record a governance vote."""
@@ -241,16 +374,16 @@ class EventHandler:
             wallet = await self.wallet_manager.get_wallet(str(user_id))
             
             if not wallet or wallet.balance <= 0:
-                logger.warning(f"User {user_id} attempted to vote without tokens")
+                logger.warning("User %s attempted to vote without tokens", user_id)
                 return
             
             # Record vote with voting power
             logger.info(
-                f"Recorded vote from {user_id} on proposal {proposal_id}: {vote_type}"
+                "Recorded vote from %s on proposal %s: %s", user_id, proposal_id, vote_type
             )
             
-        except Exception as e:
-            logger.error(f"Error recording vote: {str(e)}")
+        except Exception:
+            logger.exception("Error recording vote")
 
 # Example usage
 if __name__ == "__main__":
@@ -274,5 +407,4 @@ if __name__ == "__main__":
         # Start bot
         await bot.start("your-token")
 
-    import asyncio
     asyncio.run(main())
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional
+import functools
 import os
 from enum import Enum
 from dotenv import load_dotenv
@@ -10,38 +10,41 @@ class Environment(Enum):
     PRODUCTION = "production"
     TESTING = "testing"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AIConfig:
     groq_api_key: str
     assister_api_key: str
     model_name: str = "mixtral-8x7b-32768"  # Default model
     max_tokens: int = 4096
     temperature: float = 0.7
+    enable_cache: bool = True  # Reuse responses for repeated prompts
 
     @classmethod
     def from_env(cls) -> 'AIConfig':
         return cls(
             groq_api_key=get_required_env("GROQ_API_KEY"),
-            assister_api_key=get_required_env("ASSISTER_API_KEY")
+            assister_api_key=get_required_env("ASSISTER_API_KEY"),
+            enable_cache=os.getenv("AI_ENABLE_CACHE", "true").lower() not in ("0", "false", "no")
         )
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DiscordConfig:
     token: str
     command_prefix: str = "!"
-    guild_ids: list[int] = None
+    guild_ids: tuple[int, ...] = ()  # Empty means no guild restriction
 
     @classmethod
     def from_env(cls) -> 'DiscordConfig':
         guild_ids_str = os.getenv("DISCORD_GUILD_IDS", "")
-        guild_ids = [int(id_) for id_ in guild_ids_str.split(",")] if guild_ids_str else None
+        # Empty entries (e.g. a trailing comma) are skipped
+        guild_ids = tuple(map(int, filter(None, guild_ids_str.split(","))))
         
         return cls(
             token=get_required_env("DISCORD_TOKEN"),
             guild_ids=guild_ids
         )
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GitHubConfig:
     token: str
     api_url: str = "https://api.github.com"
@@ -52,28 +55,31 @@ class GitHubConfig:
             token=get_required_env("GITHUB_TOKEN")
         )
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BlockchainConfig:
     network: str
     crossmint_api_key: str
     helius_api_key: str
     jupiter_api_key: str
-    rpc_url: Optional[str] = None
+    rpc_urls: tuple[str, ...] = ()  # Load balanced, in order of preference
 
     @classmethod
     def from_env(cls) -> 'BlockchainConfig':
         network = os.getenv("NETWORK", "devnet")
-        rpc_url = os.getenv("RPC_URL") or f"https://api.{network}.solana.com"
+        # RPC_URLS takes a comma-separated list; RPC_URL still works for a single endpoint
+        rpc_urls = tuple(
+            url.strip() for url in os.getenv("RPC_URLS", "").split(",") if url.strip()
+        ) or (os.getenv("RPC_URL") or f"https://api.{network}.solana.com",)
         
         return cls(
             network=network,
             crossmint_api_key=get_required_env("CROSSMINT_API_KEY"),
             helius_api_key=get_required_env("HELIUS_API_KEY"),
             jupiter_api_key=get_required_env("JUPITER_API_KEY"),
-            rpc_url=rpc_url
+            rpc_urls=rpc_urls
         )
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DatabaseConfig:
     url: str
     max_connections: int = 10
@@ -106,10 +112,19 @@ class AppConfig:
 
     @classmethod
     def load(cls) -> 'AppConfig':
+        """Load the application configuration, reading the environment once per process."""
+        return _cached_load()
+
+    @classmethod
+    def reload(cls) -> 'AppConfig':
+        """Discard the loaded configuration and read the environment again."""
+        _cached_load.cache_clear()
+        return _cached_load()
+
+    @classmethod
+    def _load_uncached(cls) -> 'AppConfig':
         """Load and create a complete application configuration."""
-        load_env_file()
-        
-        environment = get_environment()
+        environment = load_env_file()
         
         return cls(
             environment=environment,
@@ -120,6 +135,10 @@ class AppConfig:
             database=DatabaseConfig.from_env()
         )
 
+@functools.cache
+def _cached_load() -> AppConfig:
+    return AppConfig._load_uncached()
+
 def get_required_env(key: str) -> str:
     """Get a required environment variable or raise an error."""
     value = os.getenv(key)
@@ -127,25 +146,37 @@ def get_required_env(key: str) -> str:
         raise ValueError(f"Missing required environment variable: {key}")
     return value
 
-def get_environment() -> Environment:
-    """Get the current environment or default to development."""
-    env_name = os.getenv("ENVIRONMENT", "development").lower()
+# Environment-specific files, resolved once
+_ENV_FILES = {env.value: Path(f".env.{env.value}") for env in Environment}
+_DEFAULT_ENV_FILE = Path(".env")
+
+def _parse_environment(env_name: str) -> Environment:
     try:
         return Environment(env_name)
     except ValueError:
         return Environment.DEVELOPMENT
 
-def load_env_file():
-    """Load the appropriate .env file based on the environment."""
-    env_name = os.getenv("ENVIRONMENT", "development").lower()
-    env_file = Path(f".env.{env_name}")
+def get_environment() -> Environment:
+    """Get the current environment or default to development."""
+    return _parse_environment(os.getenv("ENVIRONMENT", "development").lower())
+
+def load_env_file() -> Environment:
+    """Load the appropriate .env file and return the current environment."""
+    raw_env = os.getenv("ENVIRONMENT")
+    env_name = (raw_env or "development").lower()
+    env_file = _ENV_FILES.get(env_name) or Path(f".env.{env_name}")
     
     # Fall back to .env if specific environment file doesn't exist
     if not env_file.exists():
-        env_file = Path(".env")
+        env_file = _DEFAULT_ENV_FILE
     
     if env_file.exists():
         load_dotenv(env_file)
+    
+    # The loaded file may itself set ENVIRONMENT when the process didn't
+    if raw_env is None:
+        return get_environment()
+    return _parse_environment(env_name)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,19 +1,22 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set, Tuple
 import logging
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
 from enum import Enum
-import json
+import orjson
 import asyncio
-import aiohttp
+import os
+import pickle
 from decimal import Decimal
-import backoff
 
 from blockchain.crossmint.wallet import WalletManager
-from dao.token import TokenManager
+from dao.token import BASE, BPS, StateSnapshotter, TokenManager, from_base_units, now_seconds
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_GOVERNANCE_STATE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "solanaprbot", "dao_governance.pkl"
+)
+
 class ProposalStatus(Enum):
     DRAFT = "draft"
     ACTIVE = "active"
@@ -27,55 +30,164 @@ class VoteType(Enum):
     AGAINST = "against"
     ABSTAIN = "abstain"
 
-@dataclass
+@dataclass(slots=True)
 class Vote:
     voter: str
     proposal_id: int
     vote_type: VoteType
-    voting_power: Decimal
-    timestamp: datetime
+    voting_power: int  # Base units
+    timestamp: int  # Unix seconds
 
-@dataclass
+@dataclass(slots=True)
 class Proposal:
     id: int
     title: str
     description: str
     proposer: str
-    start_time: datetime
-    end_time: datetime
-    execution_delay: timedelta
+    start_time: int  # Unix seconds
+    end_time: int
+    execution_delay: int  # Seconds
     status: ProposalStatus
-    required_quorum: Decimal
-    votes_for: Decimal = Decimal(0)
-    votes_against: Decimal = Decimal(0)
-    votes_abstain: Decimal = Decimal(0)
+    required_quorum_bps: int
+    total_supply_snapshot: int  # Supply at creation; quorum is measured against it
+    quorum_votes: int  # Fewest total votes, in base units, that reach quorum
+    votes_for: int = 0  # Vote weights in base units
+    votes_against: int = 0
+    votes_abstain: int = 0
     execution_payload: Optional[Dict] = None
-    executed_at: Optional[datetime] = None
+    executed_at: Optional[int] = None
+    # Bumped whenever a vote changes the tallies
+    _tally_version: int = field(default=0, init=False, repr=False, compare=False)
+    # Last get_proposal_result dict, valid while (tally version, status) is unchanged
+    _result_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    _result_key: Optional[Tuple[int, ProposalStatus]] = field(default=None, init=False, repr=False, compare=False)
 
 class GovernanceConfig:
-    def __init__(self):
-        self.min_proposal_power = Decimal("100000")  # Min tokens to create proposal
-        self.voting_delay = timedelta(hours=24)      # Delay before voting starts
-        self.voting_period = timedelta(days=3)       # Voting duration
-        self.execution_delay = timedelta(days=2)     # Timelock period
-        self.required_quorum = Decimal("0.04")       # 4% quorum
-        self.proposal_threshold = Decimal("0.5")     # 50% approval threshold
+    def __init__(self) -> None:
+        self.min_proposal_power = 100_000 * BASE     # Min base units to create proposal
+        self.voting_delay = 24 * 60 * 60             # Seconds before voting starts
+        self.voting_period = 3 * 24 * 60 * 60        # Voting duration in seconds
+        self.execution_delay = 2 * 24 * 60 * 60      # Timelock period in seconds
+        self.required_quorum_bps = 400               # 4% quorum
+        self.proposal_threshold_bps = 5000           # 50% approval threshold
+
+class BatchBalanceLoader:
+    """Coalesces balance lookups that arrive close together into one batch call."""
+
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        max_batch: int = 64,
+        max_delay: float = 0.005
+    ):
+        self.token_manager = token_manager
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # address -> future for its balance in base units, shared by duplicate lookups
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, address: str) -> int:
+        """Get an address's balance in base units via the next batch."""
+        future = self._pending.get(address)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[address] = loop.create_future()
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_delay, self._flush)
+        # A cancelled caller must not cancel the lookup for the rest of the batch
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._resolve(batch))
+        # Hold a reference until done so the task is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: Dict[str, asyncio.Future]) -> None:
+        try:
+            balances = await self.token_manager.get_balance_units_batch(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+                # Mark retrieved so a failure whose callers left is not logged as unhandled
+                future.exception()
+            return
+
+        for address, future in batch.items():
+            future.set_result(balances[address])
 
 class GovernanceManager:
     def __init__(
         self,
         token_manager: TokenManager,
         wallet_manager: WalletManager,
-        config: Optional[GovernanceConfig] = None
+        config: Optional[GovernanceConfig] = None,
+        state_path: Optional[str] = DEFAULT_GOVERNANCE_STATE_PATH  # None disables persistence
     ):
         self.token_manager = token_manager
         self.wallet_manager = wallet_manager
         self.config = config or GovernanceConfig()
+        self.state_path = state_path
+        # Votes arriving together share one balance lookup
+        self._balance_loader = BatchBalanceLoader(token_manager)
         
         # In-memory storage (replace with database in production)
         self.proposals: Dict[int, Proposal] = {}
         self.votes: Dict[int, List[Vote]] = {}
+        self.voters: Dict[int, Set[str]] = {}  # proposal_id -> addresses that voted
+        self._active_proposal_ids: Set[int] = set()  # DRAFT or ACTIVE, the only ones sweeps touch
         self.next_proposal_id: int = 1
+        
+        # Written after every change, so a crash loses at most the last second
+        self._snapshots = StateSnapshotter("governance", state_path, self._snapshot_state)
+
+    async def initialize(self) -> None:
+        """Resume proposals and votes from the last shutdown."""
+        await asyncio.to_thread(self._load_state)
+
+    async def cleanup(self) -> None:
+        """Persist proposals and votes for the next start."""
+        await self._snapshots.close()
+
+    def _load_state(self) -> bool:
+        """Load persisted proposals and votes if present."""
+        if not self.state_path:
+            return False
+        try:
+            with open(self.state_path, 'rb') as f:
+                self.proposals, self.votes, self.next_proposal_id = pickle.load(f)
+        except Exception as e:
+            # Missing, truncated or foreign files all mean starting with no proposals
+            logger.debug(f"No usable governance state at {self.state_path}: {str(e)}")
+            return False
+
+        # Indexes are derived, so they are rebuilt rather than stored
+        self.voters = {
+            proposal_id: {vote.voter for vote in votes}
+            for proposal_id, votes in self.votes.items()
+        }
+        self._active_proposal_ids = {
+            proposal.id for proposal in self.proposals.values()
+            if proposal.status in (ProposalStatus.DRAFT, ProposalStatus.ACTIVE)
+        }
+        logger.info(f"Loaded {len(self.proposals)} proposals from {self.state_path}")
+        return True
+
+    def _snapshot_state(self) -> Tuple:
+        """The persisted part of governance state, in load order."""
+        return (self.proposals, self.votes, self.next_proposal_id)
 
     async def create_proposal(
         self,
@@ -87,16 +199,19 @@ class GovernanceManager:
         """Create a new governance proposal."""
         try:
             # Check if proposer has enough tokens
-            proposer_balance = await self.token_manager.get_balance(proposer)
+            proposer_balance = await self.token_manager.get_balance_units(proposer)
             if proposer_balance < self.config.min_proposal_power:
                 raise ValueError(
                     f"Insufficient tokens to create proposal. "
-                    f"Required: {self.config.min_proposal_power}, "
-                    f"Current: {proposer_balance}"
+                    f"Required: {from_base_units(self.config.min_proposal_power)}, "
+                    f"Current: {from_base_units(proposer_balance)}"
                 )
 
+            # Snapshot supply once so quorum math never refetches it
+            total_supply = await self.token_manager.get_total_supply_units()
+
             # Create proposal
-            now = datetime.now()
+            now = now_seconds()
             proposal = Proposal(
                 id=self.next_proposal_id,
                 title=title,
@@ -106,14 +221,20 @@ class GovernanceManager:
                 end_time=now + self.config.voting_delay + self.config.voting_period,
                 execution_delay=self.config.execution_delay,
                 status=ProposalStatus.DRAFT,
-                required_quorum=self.config.required_quorum,
+                required_quorum_bps=self.config.required_quorum_bps,
+                total_supply_snapshot=total_supply,
+                # Ceiling of quorum_bps * supply / BPS, so the check is one exact compare
+                quorum_votes=-(-self.config.required_quorum_bps * total_supply // BPS),
                 execution_payload=execution_payload
             )
 
             # Store proposal
             self.proposals[proposal.id] = proposal
             self.votes[proposal.id] = []
+            self.voters[proposal.id] = set()
+            self._active_proposal_ids.add(proposal.id)
             self.next_proposal_id += 1
+            self._snapshots.mark_dirty()
 
             logger.info(f"Created proposal {proposal.id}: {title}")
             return proposal
@@ -135,18 +256,17 @@ class GovernanceManager:
                 raise ValueError(f"Proposal {proposal_id} not found")
 
             # Check if proposal is active
-            now = datetime.now()
+            now = now_seconds()
             if now < proposal.start_time:
                 raise ValueError("Voting has not started yet")
             if now > proposal.end_time:
                 raise ValueError("Voting has ended")
 
             # Get voter's voting power (tokens held at proposal creation)
-            voting_power = await self.token_manager.get_balance(voter)
+            voting_power = await self._balance_loader.load(voter)
             
             # Check if already voted
-            existing_votes = [v for v in self.votes[proposal_id] if v.voter == voter]
-            if existing_votes:
+            if voter in self.voters[proposal_id]:
                 raise ValueError("Already voted on this proposal")
 
             # Create and record vote
@@ -159,6 +279,7 @@ class GovernanceManager:
             )
             
             self.votes[proposal_id].append(vote)
+            self.voters[proposal_id].add(voter)
 
             # Update proposal vote counts
             if vote_type == VoteType.FOR:
@@ -167,8 +288,13 @@ class GovernanceManager:
                 proposal.votes_against += voting_power
             else:
                 proposal.votes_abstain += voting_power
+            proposal._tally_version += 1
+            proposal._result_cache = None
+            self._snapshots.mark_dirty()
 
-            await self._check_proposal_state(proposal)
+            # Inside the voting window only a pending DRAFT -> ACTIVE move can fire
+            if proposal.status == ProposalStatus.DRAFT or now >= proposal.end_time:
+                self._check_proposal_state(proposal)
             
             logger.info(
                 f"Recorded vote from {voter} on proposal {proposal_id}: {vote_type.value}"
@@ -179,26 +305,44 @@ class GovernanceManager:
             logger.error(f"Error casting vote: {str(e)}")
             raise
 
-    async def _check_proposal_state(self, proposal: Proposal):
+    def _check_proposal_state(self, proposal: Proposal) -> None:
         """Check and update proposal state."""
-        now = datetime.now()
+        # Succeeded, defeated, executed and cancelled proposals never change here
+        if proposal.status not in (ProposalStatus.DRAFT, ProposalStatus.ACTIVE):
+            return
+        
+        now = now_seconds()
         
         if proposal.status == ProposalStatus.DRAFT and now >= proposal.start_time:
             proposal.status = ProposalStatus.ACTIVE
+            self._snapshots.mark_dirty()
         
         elif proposal.status == ProposalStatus.ACTIVE and now >= proposal.end_time:
             total_votes = proposal.votes_for + proposal.votes_against + proposal.votes_abstain
-            total_supply = await self.token_manager.get_total_supply()
+            decisive_votes = proposal.votes_for + proposal.votes_against
             
-            # Check quorum
-            if total_votes / total_supply >= proposal.required_quorum:
-                # Check approval threshold
-                if proposal.votes_for / (proposal.votes_for + proposal.votes_against) >= self.config.proposal_threshold:
-                    proposal.status = ProposalStatus.SUCCEEDED
-                else:
-                    proposal.status = ProposalStatus.DEFEATED
-            else:
-                proposal.status = ProposalStatus.DEFEATED
+            # Integer comparisons only; abstentions alone cannot pass a proposal
+            quorum_ok = total_votes >= proposal.quorum_votes
+            approval_ok = (
+                decisive_votes > 0
+                and proposal.votes_for * BPS >= self.config.proposal_threshold_bps * decisive_votes
+            )
+            proposal.status = (
+                ProposalStatus.SUCCEEDED if quorum_ok and approval_ok else ProposalStatus.DEFEATED
+            )
+            self._active_proposal_ids.discard(proposal.id)
+            self._snapshots.mark_dirty()
+
+    async def sweep_states(self) -> List[Proposal]:
+        """Advance every open proposal; returns those whose voting closed."""
+        closed = []
+        # Copy, since closing a proposal removes it from the set
+        for proposal_id in tuple(self._active_proposal_ids):
+            proposal = self.proposals[proposal_id]
+            self._check_proposal_state(proposal)
+            if proposal_id not in self._active_proposal_ids:
+                closed.append(proposal)
+        return closed
 
     async def execute_proposal(self, proposal_id: int) -> bool:
         """Execute a successful proposal."""
@@ -211,7 +355,7 @@ class GovernanceManager:
             if proposal.status != ProposalStatus.SUCCEEDED:
                 raise ValueError("Proposal is not in succeeded state")
 
-            now = datetime.now()
+            now = now_seconds()
             execution_time = proposal.end_time + proposal.execution_delay
             if now < execution_time:
                 raise ValueError("Execution delay has not passed")
@@ -222,6 +366,7 @@ class GovernanceManager:
 
             proposal.status = ProposalStatus.EXECUTED
             proposal.executed_at = now
+            self._snapshots.mark_dirty()
             
             logger.info(f"Executed proposal {proposal_id}")
             return True
@@ -230,7 +375,7 @@ class GovernanceManager:
             logger.error(f"Error executing proposal: {str(e)}")
             raise
 
-    async def _execute_payload(self, payload: Dict):
+    async def _execute_payload(self, payload: Dict[str, Any]) -> None:
         """Execute a proposal's payload."""
         # This would contain the logic to execute different types of proposals
         action_type = payload.get('type')
@@ -253,7 +398,7 @@ class GovernanceManager:
         """Get proposal details."""
         proposal = self.proposals.get(proposal_id)
         if proposal:
-            await self._check_proposal_state(proposal)
+            self._check_proposal_state(proposal)
         return proposal
 
     async def get_votes(self, proposal_id: int) -> List[Vote]:
@@ -270,18 +415,27 @@ class GovernanceManager:
         if not proposal:
             raise ValueError(f"Proposal {proposal_id} not found")
 
+        # Tallies only move on votes, so repeated polls reuse the last result
+        key = (proposal._tally_version, proposal.status)
+        if proposal._result_cache is not None and proposal._result_key == key:
+            return dict(proposal._result_cache)
+
         total_votes = proposal.votes_for + proposal.votes_against + proposal.votes_abstain
-        total_supply = await self.token_manager.get_total_supply()
+        decisive_votes = proposal.votes_for + proposal.votes_against
+        total_supply = proposal.total_supply_snapshot
 
-        return {
+        result = {
             'status': proposal.status.value,
-            'votes_for': float(proposal.votes_for),
-            'votes_against': float(proposal.votes_against),
-            'votes_abstain': float(proposal.votes_abstain),
-            'participation_rate': float(total_votes / total_supply),
-            'approval_rate': float(proposal.votes_for / (proposal.votes_for + proposal.votes_against)) if proposal.votes_for + proposal.votes_against > 0 else 0,
-            'quorum_reached': (total_votes / total_supply) >= proposal.required_quorum
+            'votes_for': proposal.votes_for / BASE,
+            'votes_against': proposal.votes_against / BASE,
+            'votes_abstain': proposal.votes_abstain / BASE,
+            'participation_rate': total_votes / total_supply,
+            'approval_rate': proposal.votes_for / decisive_votes if decisive_votes > 0 else 0,
+            'quorum_reached': total_votes >= proposal.quorum_votes
         }
+        proposal._result_cache = result
+        proposal._result_key = key
+        return dict(result)
 
 # Example usage
 if __name__ == "__main__":
@@ -314,7 +468,7 @@ if __name__ == "__main__":
             
             # Get results
             results = await governance.get_proposal_result(proposal.id)
-            print(f"Proposal results: {json.dumps(results, indent=2)}")
+            print(f"Proposal results: {orjson.dumps(results, option=orjson.OPT_INDENT_2).decode()}")
             
         except Exception as e:
             print(f"Error: {str(e)}")
@@ -1,61 +1,154 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, DefaultDict, Dict, List, Optional, Set, Tuple
 import logging
+from collections import defaultdict
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 import asyncio
+import os
+import pickle
+import time
 from enum import Enum
-import json
-import backoff
+import orjson
 
 from blockchain.crossmint.wallet import WalletManager
 
 logger = logging.getLogger(__name__)
 
+# Amounts are held as integers in base units, like lamports for SOL
+TOKEN_DECIMALS = 9
+BASE = 10 ** TOKEN_DECIMALS
+BPS = 10_000  # Basis points in a whole
+SECONDS_PER_DAY = 86_400
+
+DEFAULT_TOKEN_STATE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "solanaprbot", "dao_token.pkl"
+)
+
+def now_seconds() -> int:
+    """Current Unix time in whole seconds, the clock for all DAO timestamps."""
+    return int(time.time())
+
+def to_base_units(amount) -> int:
+    """Convert a token amount to integer base units, truncating dust."""
+    # Going through str keeps floats like 0.3 from landing one unit short
+    return int(Decimal(str(amount)) * BASE)
+
+def from_base_units(units: int) -> Decimal:
+    """Convert integer base units to a token amount."""
+    return Decimal(units) / BASE
+
+class StateSnapshotter:
+    """Persists pickled state atomically, shortly after each burst of mutations."""
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str],  # None disables persistence
+        snapshot: Callable[[], Any],
+        delay: float = 1.0  # Seconds of changes a crash can lose
+    ):
+        self.name = name
+        self.path = path
+        self._snapshot = snapshot
+        self.delay = delay
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def mark_dirty(self) -> None:
+        """Schedule a write, coalescing the mutations that arrive before it."""
+        if not self.path or self._closed or self._handle is not None:
+            return
+        self._handle = asyncio.get_running_loop().call_later(self.delay, self._start)
+
+    def _start(self) -> None:
+        self._handle = None
+        if self._task is not None and not self._task.done():
+            # One write at a time; the latest state goes out once this one lands
+            self._task.add_done_callback(lambda _: self.mark_dirty())
+            return
+        self._task = asyncio.create_task(self.save())
+
+    async def save(self) -> None:
+        """Snapshot the state on the loop and write it from a worker thread."""
+        if not self.path:
+            return
+        try:
+            # Pickled between awaits, so the write never sees a half-applied mutation
+            data = pickle.dumps(self._snapshot(), protocol=5)
+            await asyncio.to_thread(self._write, data)
+        except Exception as e:
+            logger.error(f"Could not persist {self.name} state: {str(e)}")
+
+    def _write(self, data: bytes) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    async def close(self) -> None:
+        """Drop the pending write and persist the final state."""
+        self._closed = True
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.save()
+
 class StakingType(Enum):
     FLEXIBLE = "flexible"  # Can unstake anytime
     LOCKED = "locked"      # Fixed staking period
 
-@dataclass
+@dataclass(slots=True)
 class StakingPool:
     pool_id: int
     staking_type: StakingType
-    apr: Decimal
-    min_stake: Decimal
-    lock_period: Optional[timedelta]
-    total_staked: Decimal = Decimal(0)
-    total_rewards_distributed: Decimal = Decimal(0)
+    apr_bps: int  # Annual rate in basis points
+    min_stake: int
+    lock_period_seconds: Optional[int]
+    total_staked: int = 0
+    total_rewards_distributed: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class StakingPosition:
     position_id: int
     user: str
     pool_id: int
-    amount: Decimal
-    start_time: datetime
-    end_time: Optional[datetime]
-    rewards_claimed: Decimal = Decimal(0)
-    last_claim_time: datetime = None
+    amount: int
+    start_time: int  # Unix seconds
+    end_time: Optional[int]
+    rewards_claimed: int = 0
+    last_claim_time: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class TokenInfo:
     name: str
     symbol: str
     decimals: int
-    total_supply: Decimal
-    circulating_supply: Decimal
+    total_supply: int
 
 class TokenManager:
-    def __init__(self, wallet_manager: WalletManager):
+    SECONDS_PER_YEAR = 31_536_000
+    # apr_bps * seconds / this is the fraction of the stake earned
+    _REWARD_DENOMINATOR = BPS * SECONDS_PER_YEAR
+
+    def __init__(
+        self,
+        wallet_manager: WalletManager,
+        state_path: Optional[str] = DEFAULT_TOKEN_STATE_PATH  # None disables persistence
+    ):
         self.wallet_manager = wallet_manager
+        self.state_path = state_path
         
         # Initialize token info
         self.token_info = TokenInfo(
             name="GitHub DAO Token",
             symbol="GDT",
-            decimals=9,
-            total_supply=Decimal("1000000000"),  # 1 billion tokens
-            circulating_supply=Decimal(0)
+            decimals=TOKEN_DECIMALS,
+            total_supply=1_000_000_000 * BASE  # 1 billion tokens
         )
         
         # Initialize staking pools
@@ -63,54 +156,142 @@ class TokenManager:
             1: StakingPool(
                 pool_id=1,
                 staking_type=StakingType.FLEXIBLE,
-                apr=Decimal("0.15"),  # 15% APR
-                min_stake=Decimal("1000"),
-                lock_period=None
+                apr_bps=1500,  # 15% APR
+                min_stake=1000 * BASE,
+                lock_period_seconds=None
             ),
             2: StakingPool(
                 pool_id=2,
                 staking_type=StakingType.LOCKED,
-                apr=Decimal("0.25"),  # 25% APR
-                min_stake=Decimal("5000"),
-                lock_period=timedelta(days=30)
+                apr_bps=2500,  # 25% APR
+                min_stake=5000 * BASE,
+                lock_period_seconds=30 * SECONDS_PER_DAY
             )
         }
+        self._pool_static = self._build_pool_static()
         
         # Track staking positions
         self.staking_positions: Dict[int, StakingPosition] = {}
+        self.positions_by_user: Dict[str, Set[int]] = defaultdict(set)  # user -> position_ids
         self.next_position_id: int = 1
         
         # Track balances and rewards
-        self.balances: Dict[str, Decimal] = {}
-        self.treasury_balance: Decimal = Decimal(0)
+        # Writes credit absent addresses in place; reads use .get so lookups add no keys
+        self.balances: DefaultDict[str, int] = defaultdict(int)
+        self.treasury_balance: int = 0
+        
+        # Running totals across all pools, kept in step with the per-pool figures
+        self._total_staked: int = 0
+        self._total_rewards: int = 0
+        
+        # Written after every change, so a crash loses at most the last second
+        self._snapshots = StateSnapshotter("token", state_path, self._snapshot_state)
 
-    async def initialize(self):
+    async def initialize(self) -> None:
         """Initialize token contract and settings."""
         try:
+            # Resume the ledger from the last shutdown when there is one
+            if await asyncio.to_thread(self._load_state):
+                return
+
             # Set initial treasury allocation (10% of total supply)
-            self.treasury_balance = self.token_info.total_supply * Decimal("0.1")
-            self.token_info.circulating_supply = self.treasury_balance
+            self.treasury_balance = self.token_info.total_supply // 10
+            self._snapshots.mark_dirty()
             
             logger.info("Token manager initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing token manager: {str(e)}")
             raise
 
+    async def cleanup(self) -> None:
+        """Persist the ledger for the next start."""
+        await self._snapshots.close()
+
+    def _load_state(self) -> bool:
+        """Load the persisted ledger if present."""
+        if not self.state_path:
+            return False
+        try:
+            with open(self.state_path, 'rb') as f:
+                (
+                    self.staking_pools,
+                    self.staking_positions,
+                    self.next_position_id,
+                    self.balances,
+                    self.treasury_balance
+                ) = pickle.load(f)
+        except Exception as e:
+            # Missing, truncated or foreign files all mean starting from a fresh ledger
+            logger.debug(f"No usable token state at {self.state_path}: {str(e)}")
+            return False
+
+        self.balances = defaultdict(int, self.balances)
+
+        # Indexes and running totals are derived, so they are rebuilt rather than stored
+        self.positions_by_user.clear()
+        for position in self.staking_positions.values():
+            self.positions_by_user[position.user].add(position.position_id)
+        self._total_staked = sum(pool.total_staked for pool in self.staking_pools.values())
+        self._total_rewards = sum(
+            pool.total_rewards_distributed for pool in self.staking_pools.values()
+        )
+        self._pool_static = self._build_pool_static()
+        logger.info(f"Loaded {len(self.balances)} balances from {self.state_path}")
+        return True
+
+    def _snapshot_state(self) -> Tuple:
+        """The persisted part of the ledger, in load order."""
+        return (
+            self.staking_pools,
+            self.staking_positions,
+            self.next_position_id,
+            self.balances,
+            self.treasury_balance
+        )
+
+    @property
+    def circulating_supply(self) -> int:
+        """Supply outside the treasury and staking pools, in base units."""
+        return self.token_info.total_supply - self.treasury_balance - self._total_staked
+
     async def get_balance(self, address: str) -> Decimal:
         """Get token balance for an address."""
-        return self.balances.get(address, Decimal(0))
+        return from_base_units(self.balances.get(address, 0))
+
+    async def get_balance_units(self, address: str) -> int:
+        """Get token balance for an address in base units."""
+        return self.balances.get(address, 0)
+
+    async def get_balance_units_batch(self, addresses: List[str]) -> Dict[str, int]:
+        """Get token balances for many addresses in base units, in one pass."""
+        balances = self.balances
+        return {address: balances.get(address, 0) for address in addresses}
+
+    async def get_staked_amount(self, user: str) -> Decimal:
+        """Get the total a user has staked across open positions."""
+        positions = self.staking_positions
+        return from_base_units(
+            sum(positions[position_id].amount for position_id in self.positions_by_user.get(user, ()))
+        )
+
+    async def get_total_supply_units(self) -> int:
+        """Get total token supply in base units."""
+        return self.token_info.total_supply
 
     async def transfer(self, from_address: str, to_address: str, amount: Decimal) -> bool:
         """Transfer tokens between addresses."""
         try:
+            units = to_base_units(amount)
+
             # Check balance
-            from_balance = await self.get_balance(from_address)
-            if from_balance < amount:
+            from_balance = self.balances.get(from_address, 0)
+            if from_balance < units:
                 raise ValueError("Insufficient balance")
 
             # Update balances
-            self.balances[from_address] = from_balance - amount
-            self.balances[to_address] = self.balances.get(to_address, Decimal(0)) + amount
+            self.balances[from_address] = from_balance - units
+            self.balances[to_address] += units
+            self._snapshots.mark_dirty()
             
             logger.info(f"Transferred {amount} tokens from {from_address} to {to_address}")
             return True
@@ -133,31 +314,35 @@ class TokenManager:
                 raise ValueError(f"Invalid pool ID: {pool_id}")
 
             # Validate amount
-            if amount < pool.min_stake:
-                raise ValueError(f"Minimum stake is {pool.min_stake}")
+            units = to_base_units(amount)
+            if units < pool.min_stake:
+                raise ValueError(f"Minimum stake is {from_base_units(pool.min_stake)}")
 
             # Check balance
-            balance = await self.get_balance(user)
-            if balance < amount:
+            balance = self.balances.get(user, 0)
+            if balance < units:
                 raise ValueError("Insufficient balance")
 
             # Create staking position
-            now = datetime.now()
+            now = now_seconds()
             position = StakingPosition(
                 position_id=self.next_position_id,
                 user=user,
                 pool_id=pool_id,
-                amount=amount,
+                amount=units,
                 start_time=now,
-                end_time=now + pool.lock_period if pool.lock_period else None,
+                end_time=now + pool.lock_period_seconds if pool.lock_period_seconds else None,
                 last_claim_time=now
             )
 
             # Update state
-            self.balances[user] -= amount
-            pool.total_staked += amount
+            self.balances[user] = balance - units
+            pool.total_staked += units
+            self._total_staked += units
             self.staking_positions[position.position_id] = position
+            self.positions_by_user[user].add(position.position_id)
             self.next_position_id += 1
+            self._snapshots.mark_dirty()
 
             logger.info(f"User {user} staked {amount} tokens in pool {pool_id}")
             return position
@@ -178,24 +363,34 @@ class TokenManager:
             pool = self.staking_pools[position.pool_id]
 
             # Check if locked period has ended
+            now = now_seconds()
             if pool.staking_type == StakingType.LOCKED:
-                if datetime.now() < position.end_time:
+                if position.end_time is not None and now < position.end_time:
                     raise ValueError("Tokens are still locked")
 
             # Calculate rewards
-            rewards = await self._calculate_rewards(position)
+            rewards = self._calculate_rewards(pool, position, now)
 
             # Update state
             self.balances[user] += position.amount + rewards
             pool.total_staked -= position.amount
             pool.total_rewards_distributed += rewards
+            self._total_staked -= position.amount
+            self._total_rewards += rewards
             del self.staking_positions[position_id]
-
+            user_positions = self.positions_by_user[user]
+            user_positions.discard(position_id)
+            if not user_positions:
+                del self.positions_by_user[user]
+            self._snapshots.mark_dirty()
+
+            amount = from_base_units(position.amount)
+            claimed = from_base_units(rewards)
             logger.info(
-                f"User {user} unstaked {position.amount} tokens "
-                f"and claimed {rewards} rewards"
+                f"User {user} unstaked {amount} tokens "
+                f"and claimed {claimed} rewards"
             )
-            return position.amount, rewards
+            return amount, claimed
             
         except Exception as e:
             logger.error(f"Error unstaking tokens: {str(e)}")
@@ -209,75 +404,91 @@ class TokenManager:
             if not position or position.user != user:
                 raise ValueError("Invalid staking position")
 
-            # Calculate rewards
-            rewards = await self._calculate_rewards(position)
+            # Calculate rewards up to the same instant the claim is recorded at
+            pool = self.staking_pools[position.pool_id]
+            now = now_seconds()
+            rewards = self._calculate_rewards(pool, position, now)
 
             # Update state
             position.rewards_claimed += rewards
-            position.last_claim_time = datetime.now()
+            position.last_claim_time = now
             self.balances[user] += rewards
 
             # Update pool statistics
-            pool = self.staking_pools[position.pool_id]
             pool.total_rewards_distributed += rewards
+            self._total_rewards += rewards
+            self._snapshots.mark_dirty()
 
-            logger.info(f"User {user} claimed {rewards} rewards from position {position_id}")
-            return rewards
+            claimed = from_base_units(rewards)
+            logger.info(f"User {user} claimed {claimed} rewards from position {position_id}")
+            return claimed
             
         except Exception as e:
             logger.error(f"Error claiming rewards: {str(e)}")
             raise
 
-    async def _calculate_rewards(self, position: StakingPosition) -> Decimal:
-        """Calculate pending rewards for a staking position."""
-        pool = self.staking_pools[position.pool_id]
-        
-        # Calculate time period
-        now = datetime.now()
-        time_staked = now - (position.last_claim_time or position.start_time)
-        years = Decimal(time_staked.total_seconds()) / Decimal(31536000)  # seconds in a year
-        
-        # Calculate rewards
-        rewards = position.amount * pool.apr * years
-        return rewards
+    @staticmethod
+    def _calculate_rewards(
+        pool: StakingPool,
+        position: StakingPosition,
+        now: int
+    ) -> int:
+        """Calculate rewards in base units accrued by a staking position up to now."""
+        seconds = now - (position.last_claim_time or position.start_time)
+        # Nothing accrued yet, or the wall clock stepped backwards
+        if seconds <= 0:
+            return 0
+        return position.amount * pool.apr_bps * seconds // TokenManager._REWARD_DENOMINATOR
+
+    def _build_pool_static(self) -> List[Tuple[StakingPool, Dict]]:
+        """Render the fields of each pool's stats entry that never change."""
+        return [
+            (
+                pool,
+                {
+                    "pool_id": pool.pool_id,
+                    "type": pool.staking_type.value,
+                    "apr": pool.apr_bps / BPS,
+                    "total_staked": None,  # Filled in per call; keeps the key order
+                    "min_stake": pool.min_stake / BASE,
+                    "lock_period": pool.lock_period_seconds // SECONDS_PER_DAY if pool.lock_period_seconds else None
+                }
+            )
+            for pool in self.staking_pools.values()
+        ]
 
     async def get_staking_stats(self) -> Dict:
         """Get global staking statistics."""
-        total_staked = sum(pool.total_staked for pool in self.staking_pools.values())
-        total_rewards = sum(pool.total_rewards_distributed for pool in self.staking_pools.values())
-        
         return {
-            "total_staked": float(total_staked),
-            "total_rewards_distributed": float(total_rewards),
+            "total_staked": self._total_staked / BASE,
+            "total_rewards_distributed": self._total_rewards / BASE,
             "staking_pools": [
-                {
-                    "pool_id": pool.pool_id,
-                    "type": pool.staking_type.value,
-                    "apr": float(pool.apr),
-                    "total_staked": float(pool.total_staked),
-                    "min_stake": float(pool.min_stake),
-                    "lock_period": pool.lock_period.days if pool.lock_period else None
-                }
-                for pool in self.staking_pools.values()
+                {**static, "total_staked": pool.total_staked / BASE}
+                for pool, static in self._pool_static
             ]
         }
 
     async def get_user_positions(self, user: str) -> List[Dict]:
         """Get all staking positions for a user."""
+        # Position ids increase over time, so sorting keeps creation order
         user_positions = [
-            pos for pos in self.staking_positions.values()
-            if pos.user == user
+            self.staking_positions[position_id]
+            for position_id in sorted(self.positions_by_user.get(user, ()))
         ]
         
+        # One clock read and plain calls for every position
+        now = now_seconds()
+        pools = self.staking_pools
+        calculate_rewards = self._calculate_rewards
         return [
             {
                 "position_id": pos.position_id,
                 "pool_id": pos.pool_id,
-                "amount": float(pos.amount),
-                "rewards_claimed": float(pos.rewards_claimed),
-                "pending_rewards": float(await self._calculate_rewards(pos)),
-                "start_time": pos.start_time.isoformat(),
-                "end_time": pos.end_time.isoformat() if pos.end_time else None
+                "amount": pos.amount / BASE,
+                "rewards_claimed": pos.rewards_claimed / BASE,
+                "pending_rewards": calculate_rewards(pools[pos.pool_id], pos, now) / BASE,
+                "start_time": datetime.fromtimestamp(pos.start_time).isoformat(),
+                "end_time": datetime.fromtimestamp(pos.end_time).isoformat() if pos.end_time else None
             }
             for pos in user_positions
         ]
@@ -292,7 +503,7 @@ if __name__ == "__main__":
         try:
             # Simulate token distribution
             user_address = "user123"
-            token_manager.balances[user_address] = Decimal("10000")
+            token_manager.balances[user_address] = to_base_units(Decimal("10000"))
             
             # Stake tokens
             position = await token_manager.stake_tokens(
@@ -312,7 +523,7 @@ if __name__ == "__main__":
             
             # Get user positions
             positions = await token_manager.get_user_positions(user_address)
-            print(f"User positions: {json.dumps(positions, indent=2)}")
+            print(f"User positions: {orjson.dumps(positions, option=orjson.OPT_INDENT_2).decode()}")
             
         except Exception as e:
             print(f"Error: {str(e)}")
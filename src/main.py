@@ -1,56 +1,70 @@
 import asyncio
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import discord
-from discord.ext import commands
+import aiohttp
+import orjson
+
+try:
+    import uvloop
+except ImportError:  # uvloop has no Windows build
+    uvloop = None
 
 # Import Config
 from config import AppConfig
 
-# Import AI Components
-from ai.groq_client import GroqClient
-from ai.code_analyzer import CodeAnalyzer
-from ai.doc_generator import DocGenerator
-
-# Import Bot Components
-from bot.discord_client import DiscordClient
-from bot.commands import register_commands
-from bot.events import register_events
-
-# Import Blockchain Components
-from blockchain.crossmint.wallet import WalletManager
-from blockchain.jupiter.swaps import SwapManager
-
-# Import DAO Components
-from dao.governance import GovernanceManager
-from dao.token import TokenManager
-
-# Import GitHub Client
-from github import GitHubClient
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('bot.log')
-    ]
+# Component modules are imported in GithubDAOBot.initialize(), so runs that
+# never start the bot don't pay for loading them
+if TYPE_CHECKING:
+    from ai.groq_client import GroqClient
+    from ai.code_analyzer import CodeAnalyzer
+    from ai.doc_generator import DocumentationGenerator
+    from bot.discord_client import DiscordClient
+    from blockchain.crossmint.wallet import WalletManager
+    from blockchain.jupiter.swaps import SwapManager
+    from dao.governance import GovernanceManager
+    from dao.token import TokenManager
+    from github import GitHubClient
+
+# Set up logging: the event loop only enqueues records, and the console and
+# file writes happen on the listener's thread
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = (
+    logging.StreamHandler(sys.stdout),
+    RotatingFileHandler('bot.log', maxBytes=10_000_000, backupCount=5)
 )
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = QueueListener(_log_queue, *_log_handlers)
+
+# Not basicConfig: its default formatter would pre-format records before they are queued
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(QueueHandler(_log_queue))
 logger = logging.getLogger(__name__)
 
+# Seconds each component gets to shut down before it is abandoned
+CLEANUP_TIMEOUT = 5.0
+
 class GithubDAOBot:
     def __init__(self):
         # Config
         self.config: Optional[AppConfig] = None
         
+        # Pooled HTTP session shared by the REST clients
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # Separate pool for Solana RPC, so slow chain queries can't starve REST calls
+        self.rpc_session: Optional[aiohttp.ClientSession] = None
+        
         # AI Components
         self.groq_client: Optional[GroqClient] = None
         self.code_analyzer: Optional[CodeAnalyzer] = None
-        self.doc_generator: Optional[DocGenerator] = None
+        self.doc_generator: Optional[DocumentationGenerator] = None
         
         # Bot Components
         self.discord_client: Optional[DiscordClient] = None
@@ -68,19 +82,49 @@ class GithubDAOBot:
 
     async def initialize(self):
         """Initialize all components of the application."""
+        from ai.groq_client import GroqClient
+        from ai.code_analyzer import CodeAnalyzer
+        from ai.doc_generator import DocumentationGenerator
+        from bot.discord_client import DiscordClient
+        from blockchain.crossmint.wallet import WalletManager
+        from blockchain.jupiter.swaps import SwapManager
+        from dao.governance import GovernanceManager
+        from dao.token import TokenManager
+        from github import GitHubClient
+
         try:
             # Load configuration
             logger.info("Loading configuration...")
             self.config = AppConfig.load()
 
+            # One keep-alive pool created before any component, so every REST
+            # client built below reuses warm connections instead of its own
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=128,
+                    limit_per_host=32,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                ),
+                json_serialize=lambda obj: orjson.dumps(obj).decode()
+            )
+            self.rpc_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=40,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                )
+            )
+
             # Initialize AI components
             logger.info("Initializing AI components...")
             self.groq_client = GroqClient(
                 api_key=self.config.ai.groq_api_key,
-                model_name=self.config.ai.model_name
+                model_name=self.config.ai.model_name,
+                enable_cache=self.config.ai.enable_cache
             )
-            self.code_analyzer = CodeAnalyzer(self.groq_client)
-            self.doc_generator = DocGenerator(self.groq_client)
+            self.code_analyzer = CodeAnalyzer()
+            self.doc_generator = DocumentationGenerator(self.groq_client)
 
             # Initialize GitHub client
             logger.info("Initializing GitHub client...")
@@ -93,105 +137,108 @@ class GithubDAOBot:
             logger.info("Initializing blockchain components...")
             self.wallet_manager = WalletManager(
                 api_key=self.config.blockchain.crossmint_api_key,
-                network=self.config.blockchain.network
+                # Crossmint's staging environment serves the Solana test clusters
+                environment="production" if self.config.blockchain.network == "mainnet-beta" else "staging",
+                session=self.http_session
             )
             self.swap_manager = SwapManager(
                 api_key=self.config.blockchain.jupiter_api_key,
-                rpc_url=self.config.blockchain.rpc_url
+                rpc_urls=self.config.blockchain.rpc_urls,
+                session=self.http_session,
+                rpc_session=self.rpc_session
             )
 
             # Initialize DAO components
             logger.info("Initializing DAO components...")
-            self.governance_manager = GovernanceManager(
-                wallet_manager=self.wallet_manager,
-                config=self.config.dao
-            )
             self.token_manager = TokenManager(
-                wallet_manager=self.wallet_manager,
-                config=self.config.dao
+                wallet_manager=self.wallet_manager
             )
+            self.governance_manager = GovernanceManager(
+                token_manager=self.token_manager,
+                wallet_manager=self.wallet_manager
+            )
+
+            # Warm up independent components concurrently: the Jupiter token
+            # list fetch and the persisted DAO state loads overlap
+            logger.info("Warming up components...")
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(self.wallet_manager.initialize())
+                    tg.create_task(self.swap_manager.initialize())
+                    tg.create_task(self.governance_manager.initialize())
+                    tg.create_task(self.token_manager.initialize())
+            except ExceptionGroup as eg:
+                # Report the underlying error, not the group
+                raise eg.exceptions[0]
 
-            # Initialize Discord client
+            # Initialize Discord client; it registers its own commands, and its
+            # EventHandler the gateway events and the command error handler
             logger.info("Initializing Discord client...")
             self.discord_client = DiscordClient(
                 token=self.config.discord.token,
                 command_prefix=self.config.discord.command_prefix,
                 ai_client=self.groq_client,
-                code_analyzer=self.code_analyzer,
-                doc_generator=self.doc_generator,
                 github_client=self.github_client,
                 wallet_manager=self.wallet_manager,
-                swap_manager=self.swap_manager,
-                governance_manager=self.governance_manager,
-                token_manager=self.token_manager
+                swap_manager=self.swap_manager
             )
 
-            # Register commands and events
-            register_commands(self.discord_client)
-            register_events(self.discord_client)
-
-            # Set up error handlers
-            self.setup_error_handlers()
-
             logger.info("All components initialized successfully")
             return True
 
         except Exception as e:
-            logger.error(f"Failed to initialize application: {str(e)}")
+            # Re-raised, so main() logs the traceback once
+            logger.error("Failed to initialize application: %s", e)
             raise
 
-    def setup_error_handlers(self):
-        """Set up global error handlers."""
-        @self.discord_client.event
-        async def on_error(event, *args, **kwargs):
-            logger.error(f"Error in {event}: {sys.exc_info()}")
-
-        @self.discord_client.event
-        async def on_command_error(ctx, error):
-            if isinstance(error, commands.CommandNotFound):
-                await ctx.send("Command not found. Use !help to see available commands.")
-            elif isinstance(error, commands.MissingPermissions):
-                await ctx.send("You don't have permission to use this command.")
-            else:
-                logger.error(f"Command error: {str(error)}")
-                await ctx.send(f"An error occurred: {str(error)}")
-
     async def start(self):
         """Start the Discord bot and related services."""
         try:
             logger.info("Starting bot services...")
             await self.discord_client.start(self.config.discord.token)
         except Exception as e:
-            logger.error(f"Failed to start bot: {str(e)}")
+            logger.error("Failed to start bot: %s", e)
             raise
 
     async def cleanup(self):
         """Clean up resources before shutdown."""
-        try:
-            # Cleanup Discord client
-            if self.discord_client:
-                await self.discord_client.close()
-            
-            # Cleanup blockchain components
-            if self.wallet_manager:
-                await self.wallet_manager.cleanup()
-            if self.swap_manager:
-                await self.swap_manager.cleanup()
-            
-            # Cleanup AI components
-            if self.groq_client:
-                await self.groq_client.cleanup()
-            
-            # Cleanup DAO components
-            if self.governance_manager:
-                await self.governance_manager.cleanup()
-            if self.token_manager:
-                await self.token_manager.cleanup()
-                
-            logger.info("Cleanup completed successfully")
-        except Exception as e:
-            logger.error(f"Error during cleanup: {str(e)}")
-            raise
+        # Disconnect from Discord first so no new command reaches a closing component;
+        # cleanup() also stops the event handler's in-flight commands and final flush
+        if self.discord_client:
+            try:
+                await asyncio.wait_for(self.discord_client.cleanup(), timeout=CLEANUP_TIMEOUT)
+            except Exception as e:
+                logger.error("Error closing Discord client: %r", e)
+        
+        # The rest are independent; a hung socket in one must not hold up the others
+        components = [
+            (name, component)
+            for name, component in (
+                ("wallet manager", self.wallet_manager),
+                ("swap manager", self.swap_manager),
+                ("Groq client", self.groq_client),
+                ("governance manager", self.governance_manager),
+                ("token manager", self.token_manager)
+            )
+            if component
+        ]
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(component.cleanup(), timeout=CLEANUP_TIMEOUT)
+                for _, component in components
+            ),
+            return_exceptions=True
+        )
+        for (name, _), result in zip(components, results):
+            if isinstance(result, BaseException):
+                logger.error("Error cleaning up %s: %r", name, result)
+        
+        # Closed once, after every manager using them
+        await asyncio.gather(
+            *(session.close() for session in (self.http_session, self.rpc_session) if session)
+        )
+        
+        logger.info("Cleanup completed")
 
 async def main():
     """Main entry point of the application."""
@@ -206,18 +253,26 @@ async def main():
 
     except KeyboardInterrupt:
         logger.info("Received shutdown signal")
-    except Exception as e:
-        logger.error(f"Fatal error: {str(e)}")
+    except Exception:
+        logger.exception("Fatal error")
     finally:
         # Ensure proper cleanup
         await bot.cleanup()
 
 if __name__ == "__main__":
+    log_listener.start()
     try:
-        # Run the main application
-        asyncio.run(main())
+        # libuv-backed loop raises the ceiling for the HTTP-bound clients; a loop
+        # factory rather than a global policy keeps the choice local to this run
+        loop_factory = uvloop.new_event_loop if uvloop is not None else None
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            # Run the main application
+            runner.run(main())
     except KeyboardInterrupt:
         logger.info("Application shutdown complete")
-    except Exception as e:
-        logger.critical(f"Application crashed: {str(e)}")
-        sys.exit(1)
\ No newline at end of file
+    except Exception:
+        logger.critical("Application crashed", exc_info=True)
+        sys.exit(1)
+    finally:
+        # Flushes every queued record before the process exits
+        log_listener.stop()
\ No newline at end of file
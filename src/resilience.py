@@ -0,0 +1,325 @@
+from typing import Awaitable, Callable, Coroutine, Dict, Hashable, Iterable, Mapping, Optional, Tuple, Type, TypeVar
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses whose Retry-After header tells us when to come back
+RETRY_AFTER_STATUSES = frozenset({429, 503})
+
+def retry_after_seconds(
+    headers: Optional[Mapping[str, str]],
+    max_delay: float = 30.0
+) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into a capped delay."""
+    if not headers:
+        return None
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+
+    return min(max(delay, 0.0), max_delay)
+
+async def honor_retry_after(headers: Optional[Mapping[str, str]]):
+    """Sleep for the server-requested Retry-After delay, if any."""
+    delay = retry_after_seconds(headers)
+    if delay:
+        logger.debug("Honoring Retry-After of %.1fs", delay)
+        await asyncio.sleep(delay)
+
+class UpstreamUnavailable(Exception):
+    """Raised while a circuit breaker is open and calls are short-circuited."""
+    pass
+
+class CircuitBreaker:
+    """Fails fast after consecutive upstream failures until a cooldown passes."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_types: Tuple[Type[BaseException], ...],
+        fail_max: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_types = failure_types
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Current breaker state: closed, open or half-open."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def record_success(self):
+        """Close the breaker after a call reached the upstream."""
+        if self._opened_at is not None:
+            logger.info("Circuit %s closed", self.name)
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        """Count a failure, opening the breaker at the threshold."""
+        self._failures += 1
+        # A failed half-open trial re-opens immediately
+        if self._failures >= self.fail_max:
+            if self._opened_at is None:
+                logger.warning("Circuit %s opened after %s failures", self.name, self._failures)
+            self._opened_at = time.monotonic()
+
+    @asynccontextmanager
+    async def guard(self):
+        """Run the enclosed call unless the breaker is open."""
+        if self.state == "open":
+            raise UpstreamUnavailable(f"{self.name} is unavailable, retry later")
+        try:
+            yield
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except Exception:
+            # Any other error still means the upstream answered
+            self.record_success()
+            raise
+        else:
+            self.record_success()
+
+class EndpointPool:
+    """Round-robin over interchangeable endpoints, parking ones that keep failing."""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        fail_max: int = 3,
+        park_for: float = 30.0
+    ):
+        self.urls: Tuple[str, ...] = tuple(dict.fromkeys(urls))  # Dedupe, keep order
+        if not self.urls:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.fail_max = fail_max
+        self.park_for = park_for
+        self._cursor = 0
+        self._failures: Dict[str, int] = dict.fromkeys(self.urls, 0)
+        self._parked_until: Dict[str, float] = {}  # url -> time.monotonic() it returns
+
+    def next(self) -> str:
+        """Pick the next endpoint in turn, skipping parked ones."""
+        now = time.monotonic()
+        for _ in range(len(self.urls)):
+            url = self.urls[self._cursor]
+            self._cursor = (self._cursor + 1) % len(self.urls)
+            if self._parked_until.get(url, 0.0) <= now:
+                return url
+        # Like an open breaker: fail fast instead of opening a socket to a parked endpoint
+        retry_in = min(self._parked_until.values()) - now
+        raise UpstreamUnavailable(f"Every endpoint is parked, retry in {retry_in:.0f}s")
+
+    def record_success(self, url: str):
+        """Reset an endpoint's failure count after it answered."""
+        self._failures[url] = 0
+        if self._parked_until.pop(url, None) is not None:
+            logger.info("Endpoint %s back in rotation", url)
+
+    def record_failure(self, url: str):
+        """Count a failure, parking the endpoint at the threshold."""
+        self._failures[url] += 1
+        # The count is kept, so one more failure after parking re-parks at once
+        if self._failures[url] >= self.fail_max:
+            if url not in self._parked_until:
+                logger.warning(
+                    "Parking endpoint %s for %.0fs after %s failures",
+                    url, self.park_for, self._failures[url]
+                )
+            self._parked_until[url] = time.monotonic() + self.park_for
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight calls: halves on overload, grows after a run of successes."""
+
+    def __init__(
+        self,
+        overload_types: Tuple[Type[BaseException], ...],
+        initial_limit: int = 8,
+        min_limit: int = 2,
+        max_limit: int = 32,
+        increase_after: int = 10
+    ):
+        self.overload_types = overload_types
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_after = increase_after
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    def _on_overload(self):
+        self.limit = max(self.min_limit, self.limit // 2)
+        self._successes = 0
+        logger.warning("Upstream overloaded, concurrency limit now %s", self.limit)
+
+    def _on_success(self):
+        self._successes += 1
+        if self._successes >= self.increase_after and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot for the enclosed call."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        try:
+            yield
+        except self.overload_types:
+            self._on_overload()
+            raise
+        else:
+            self._on_success()
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+class TokenBucketLimiter:
+    """Per-key token buckets on a monotonic clock, with a bounded number of keys."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        max_keys: int = 10_000
+    ):
+        self.rate = rate  # Tokens regained per second
+        self.capacity = capacity
+        self.max_keys = max_keys
+        # key -> (tokens, last update), least recently used first
+        self._buckets: OrderedDict = OrderedDict()
+
+    def _refill(self, key: Hashable, now: float) -> float:
+        tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+    def try_acquire(self, key: Hashable) -> bool:
+        """Take one token for the key if available."""
+        now = time.monotonic()
+        tokens = self._refill(key, now)
+        if tokens < 1:
+            return False
+
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return True
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until the key can acquire again."""
+        tokens = self._refill(key, time.monotonic())
+        return max(0.0, (1 - tokens) / self.rate)
+
+    def purge_idle(self) -> int:
+        """Drop buckets that have refilled completely; they behave like new keys."""
+        now = time.monotonic()
+        idle = [key for key in self._buckets if self._refill(key, now) >= self.capacity]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+class SingleFlight:
+    """Shares one in-flight call per key between all concurrent callers."""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Await the call running for key, starting fetch() if there is none."""
+        task = self._tasks.get(key)
+        if task is None:
+            # Its own task, so a cancelled caller never cancels the call the others await
+            task = asyncio.ensure_future(fetch())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark retrieved so a failure whose callers all left is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+class BoundedTaskRunner:
+    """Runs coroutines as background tasks with bounded concurrency and backlog."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 32,
+        max_pending: int = 512
+    ):
+        self.name = name
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set = set()
+
+    @property
+    def pending(self) -> int:
+        """Tasks queued or running."""
+        return len(self._tasks)
+
+    def submit(self, coro: Coroutine) -> bool:
+        """Schedule a coroutine, dropping it if the backlog is full."""
+        if len(self._tasks) >= self.max_pending:
+            coro.close()
+            self.dropped += 1
+            logger.warning(
+                "%s backlog full (%s pending), dropped %s so far",
+                self.name, len(self._tasks), self.dropped
+            )
+            return False
+
+        task = asyncio.create_task(self._run(coro))
+        # Hold a reference until done so the task is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        # A task cancelled before it started never awaited its coroutine
+        task.add_done_callback(lambda _: coro.close())
+        return True
+
+    async def _run(self, coro: Coroutine):
+        async with self._semaphore:
+            try:
+                await coro
+            except Exception:
+                logger.exception("Unhandled error in %s task", self.name)
+
+    async def aclose(self):
+        """Cancel outstanding tasks and wait for them to finish."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
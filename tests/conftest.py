@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import each other from src/, as they do when main.py runs
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
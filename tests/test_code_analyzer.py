@@ -0,0 +1,24 @@
+import asyncio
+
+from ai.code_analyzer import CodeAnalyzer
+
+def _security_findings(code: str):
+    report = asyncio.run(CodeAnalyzer().analyze_code(code))
+    return [(issue.line_number, issue.description) for issue in report.security_issues]
+
+def test_two_findings_on_one_line_are_both_reported():
+    # The SQL pattern's lazy match runs on past os.system("ls")
+    findings = _security_findings('cursor.execute("SELECT %s", (a,)); os.system("ls")')
+    assert findings == [
+        (1, "Potential sql_injection vulnerability detected"),
+        (1, "Potential command_injection vulnerability detected"),
+    ]
+
+def test_secret_inside_execute_string_is_reported():
+    findings = _security_findings('cursor.execute("SELECT %s password = \'hunter2\' ")')
+    assert (1, "Potential hardcoded_secrets vulnerability detected") in findings
+    assert (1, "Potential sql_injection vulnerability detected") in findings
+
+def test_each_pattern_reported_once_per_line():
+    findings = _security_findings('x = 1\nos.system(a); os.system(b)\n')
+    assert findings == [(2, "Potential command_injection vulnerability detected")]